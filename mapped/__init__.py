@@ -14,13 +14,41 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import importlib
+
 from .basemap import make_basemap, add_basemap
-from .plotly import plotly_choropleth, plotly_scatter, plotly_heatmap, plotly_lines
 from . import caching
-from .dotdensity import generate_points_in_areas
+from .dotdensity import generate_points_in_areas, iter_points_in_areas, write_points_in_areas, PreparedZones, plot_dotdensity
 from .simple import centroid_internal, make_points_geodataframe
-from .gdf_viewer import GeoDataFrameViz as Viz
-from .omx_viewer import OMXViz
 from geopandas import GeoDataFrame, GeoSeries
 
 __version__ = "20.4.2"
+
+# These depend on plotly, ipywidgets, sklearn, etc., which are slow to
+# import, so they are only loaded when first accessed.
+_lazy_attributes = {
+	'plotly_choropleth': ('.plotly', 'plotly_choropleth'),
+	'plotly_scatter': ('.plotly', 'plotly_scatter'),
+	'plotly_heatmap': ('.plotly', 'plotly_heatmap'),
+	'plotly_lines': ('.plotly', 'plotly_lines'),
+	'Viz': ('.gdf_viewer', 'GeoDataFrameViz'),
+	'OMXViz': ('.omx_viewer', 'OMXViz'),
+}
+
+_lazy_submodules = {
+	'plotly', 'gdf_viewer', 'omx_viewer', 'density', 'tiles', 'example_data', 'sources',
+}
+
+def __getattr__(name):
+	if name in _lazy_attributes:
+		module_name, attr = _lazy_attributes[name]
+		value = getattr(importlib.import_module(module_name, __name__), attr)
+	elif name in _lazy_submodules:
+		value = importlib.import_module(f".{name}", __name__)
+	else:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	globals()[name] = value
+	return value
+
+def __dir__():
+	return sorted(set(globals()) | set(_lazy_attributes) | _lazy_submodules)
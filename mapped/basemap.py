@@ -1,8 +1,30 @@
-import contextily as ctx
 import geopandas as gpd
-from matplotlib import pyplot as plt
 from pyproj import CRS
-from rasterio.errors import CRSError
+from . import caching
+from .caching import MemoryLRU
+
+# contextily, rasterio and matplotlib.pyplot are slow to import, so they
+# (and mapped.tiles, which needs them) are imported when first used.
+
+_basemap_memo = MemoryLRU(256 * 1024**2)
+
+
+def set_basemap_memory(max_bytes=256 * 1024**2):
+	"""
+	Set the size of the in-memory cache of rendered basemap images.
+
+	Each finished (merged and, if needed, reprojected) basemap image is
+	kept in memory, keyed by the tile source, zoom, extent, crs and
+	figure size, so that drawing another map of the same area only
+	needs to redraw the image.
+
+	Parameters
+	----------
+	max_bytes : int, default 256 MiB
+		The maximum total size of the cached images.  Set to 0 to
+		disable and clear this cache.
+	"""
+	_basemap_memo.resize(max_bytes)
 
 def make_basemap(
 		xlim,
@@ -14,6 +36,7 @@ def make_basemap(
 		zoom='auto',
 		crs=None,
 		epsg=None,
+		max_tiles=None,
 ):
 	"""
 	Initialize a map plot with a basemap.
@@ -31,14 +54,16 @@ def make_basemap(
 		The base url to use for the map tile, or a named value in
 		contextily.sources, for example: OSM_A, ST_TERRAIN, ST_TONER_LITE.
 		See `https://github.com/geopandas/contextily/blob/master/contextily/_providers.py`
-		for other named values.
+		for other named values.  This can also be the path to a local MBTiles
+		file, or to a directory of tiles laid out as `{z}/{x}/{y}.png`.
 	zoom: int, or 'auto'
 		The zoom level of the map tiles to download.  Note that this does
 		not actually change the magnification of the rendered map, just the size
 		and level of detail in the mapping tiles used to render a base map.
 		Selecting a zoom level that is too high will result in a large download
 		with excessive detail (and unreadably small labels, if labels are included
-		in the tiles).
+		in the tiles).  The 'auto' zoom is the lowest level with tiles at least
+		as detailed as the rendered map, given the figure size and dpi.
 	crs: dict, optional
 		The coordinate reference system of the map being rendered.  Map tiles are
 		all in web mercator (epsg:3857), so if the map is some other CRS, it must
@@ -46,6 +71,9 @@ def make_basemap(
 	epsg: int, optional
 		You may specify a crs as an epsg integer here instead of using the `crs`
 		argument.
+	max_tiles: int, optional
+		When `zoom` is 'auto', reduce the zoom level as needed to use no more
+		than this many map tiles.
 
 	Returns
 	-------
@@ -57,6 +85,8 @@ def make_basemap(
 	if crs is None:
 		crs = {'init': f'epsg:3857'}
 
+	from matplotlib import pyplot as plt
+
 	fig, ax = plt.subplots(figsize=figsize)
 	ax.set_aspect("equal")
 	if axis is not None:
@@ -64,7 +94,7 @@ def make_basemap(
 	ax.set_xlim(*xlim)
 	ax.set_ylim(*ylim)
 	if tiles is not None:
-		ax = add_basemap(ax, zoom=zoom, tiles=tiles, crs=crs)
+		ax = add_basemap(ax, zoom=zoom, tiles=tiles, crs=crs, max_tiles=max_tiles)
 	return ax
 
 
@@ -77,6 +107,7 @@ def add_basemap(
 		epsg=None,
 		axis='off',
 		figsize=None,
+		max_tiles=None,
 		**kwargs,
 ):
 	"""
@@ -93,12 +124,18 @@ def add_basemap(
 		and level of detail in the mapping tiles used to render a base map.
 		Selecting a zoom level that is too high will result in a large download
 		with excessive detail (and unreadably small labels, if labels are included
-		in the tiles).
+		in the tiles).  The 'auto' zoom is the lowest level with tiles at least
+		as detailed as the rendered map, given the figure size and dpi.
 	tiles: str
 		The base url to use for the map tile, or a named value in
 		contextily.sources, for example: "OpenStreetMap", "Stamen.Terrain", "Stamen.TonerLite".
 		See `https://github.com/geopandas/contextily/blob/master/contextily/_providers.py`
-		for other possible values.
+		for other possible values.  A url template with `{z}`, `{x}` and `{y}`
+		placeholders can also be given.  Tiles from web servers are downloaded
+		concurrently; use `mapped.tiles.set_host_limit` to limit the number of
+		simultaneous connections to any one server.  For offline use, this can
+		also be the path to a local MBTiles file, or to a directory of tiles
+		laid out as `{z}/{x}/{y}.png`.
 	crs: dict, optional
 		The coordinate reference system of the map being rendered.  Map tiles are
 		all in web mercator (epsg:3857), so if the map is some other CRS, it must
@@ -108,6 +145,9 @@ def add_basemap(
 	epsg: int, optional
 		You may specify a crs as an epsg integer here instead of using the `crs`
 		argument.
+	max_tiles: int, optional
+		When `zoom` is 'auto', reduce the zoom level as needed to use no more
+		than this many map tiles.
 	axis: str or None, default "off"
 		Set to "off" to remove the axis and axis labels, or "on" to draw axis labels.
 		Set to None to leave the axis settings unchanged.
@@ -119,58 +159,51 @@ def add_basemap(
 	-------
 	AxesSubplot
 	"""
-	providers = None
-	if isinstance(tiles, str):
-		providers = ctx.providers
-		tiles_dots = tiles.split('.')
-		while len(tiles_dots):
-			if tiles_dots[0] in providers:
-				providers = providers[tiles_dots[0]]
-				try:
-					tiles_dots = tiles_dots[1:]
-				except IndexError:
-					tiles_dots = []
-			else:
-				providers = None
-				break
-		while isinstance(providers, dict) and 'url' not in providers and len(providers):
-			providers = next(iter(providers.values()))
-		if not isinstance(providers, dict) or len(providers) == 0:
-			providers = None
-	elif isinstance(tiles, dict):
-		providers = tiles
-
-	if providers is not None:
-		url = providers
-		attribution_txt = providers.get('attribution', None)
-	else:
-		url = getattr(ctx.sources, tiles, tiles)
-		attribution_txt = None
+	import contextily as ctx
+	from rasterio.errors import CRSError
+	from . import tiles as _tiles
+
+	caching._ensure_cache()
+	url, attribution_txt = _tiles.resolve_source(tiles)
 
 	if epsg is not None:
 		crs = {'init': f'epsg:{epsg}'}
 	crs = getattr(ax, 'crs', crs)
 
-	try:
-		ctx.add_basemap(
+	if (
+			isinstance(url, (dict, _tiles.LocalTileSource))
+			or (isinstance(url, str) and url[:4] == "http")
+	):
+		_add_tiled_basemap(
 			ax,
 			zoom=zoom,
 			source=url,
 			crs=crs,
+			attribution=kwargs.pop('attribution', attribution_txt),
+			max_tiles=max_tiles,
 			**kwargs,
 		)
-	except CRSError as err:
-		epsg = crs.to_epsg()
-		if epsg:
+	else:
+		try:
 			ctx.add_basemap(
 				ax,
 				zoom=zoom,
 				source=url,
-				crs=CRS(f"epsg:{epsg}"),
+				crs=crs,
 				**kwargs,
 			)
-		else:
-			raise
+		except CRSError as err:
+			epsg = crs.to_epsg()
+			if epsg:
+				ctx.add_basemap(
+					ax,
+					zoom=zoom,
+					source=url,
+					crs=CRS(f"epsg:{epsg}"),
+					**kwargs,
+				)
+			else:
+				raise
 
 	if axis is not None:
 		ax.axis(axis)  # don't show axis
@@ -183,6 +216,112 @@ def add_basemap(
 
 	return ax
 
+def _rasterio_crs(crs):
+	"""
+	Convert a crs to a form rasterio understands, or None for web mercator.
+	"""
+	if crs is None:
+		return None
+	crs = CRS.from_user_input(crs)
+	epsg = crs.to_epsg()
+	if epsg == 3857:
+		return None
+	if epsg:
+		return f"EPSG:{epsg}"
+	return crs.to_wkt()
+
+
+def _add_tiled_basemap(
+		ax,
+		zoom='auto',
+		source=None,
+		crs=None,
+		attribution=None,
+		attribution_size=8,
+		interpolation='bilinear',
+		reset_extent=True,
+		resampling=None,
+		fetcher=None,
+		max_tiles=None,
+		**extra_imshow_args,
+):
+	"""
+	Download map tiles concurrently and draw them on `ax`.
+
+	This follows the same rendering steps as `contextily.add_basemap`,
+	but the tiles are fetched with a `mapped.tiles.TileFetcher`, and the
+	finished image is remembered (see `set_basemap_memory`).  An 'auto'
+	zoom is chosen from the size of `ax` in pixels, see
+	`mapped.tiles.auto_zoom`.
+	"""
+	import contextily as ctx
+	from rasterio.warp import transform_bounds
+	from . import tiles as _tiles
+
+	xmin, xmax, ymin, ymax = ax.axis()
+	t_crs = _rasterio_crs(crs)
+	fig = ax.get_figure()
+
+	left, right, bottom, top = xmin, xmax, ymin, ymax
+	if t_crs is not None:
+		left, bottom, right, top = transform_bounds(t_crs, "EPSG:3857", xmin, ymin, xmax, ymax)
+
+	if zoom == 'auto':
+		bbox = ax.get_window_extent()
+		zoom = _tiles.auto_zoom(
+			left, bottom, right, top,
+			width=bbox.width,
+			height=bbox.height,
+			max_tiles=max_tiles,
+		)
+
+	memo_key = (
+		_tiles.provider_name(source),
+		zoom,
+		tuple(round(float(v), 6) for v in (xmin, xmax, ymin, ymax)),
+		t_crs,
+		tuple(int(round(v)) for v in fig.get_size_inches() * fig.dpi),
+		str(resampling),
+	)
+	memo = _basemap_memo.get(memo_key)
+	if memo is not None:
+		image, extent = memo
+	else:
+		image, extent = _tiles.bounds2img(left, bottom, right, top, zoom=zoom, source=source, fetcher=fetcher)
+
+		if t_crs is not None:
+			warp_kwargs = {} if resampling is None else {'resampling': resampling}
+			image, extent = ctx.warp_tiles(image, extent, t_crs=t_crs, **warp_kwargs)
+
+		image.setflags(write=False)
+		_basemap_memo.put(memo_key, (image, extent))
+
+	if isinstance(source, dict) and source.get("opacity", 1.0) < 1.0:
+		extra_imshow_args.setdefault("zorder", 9)
+
+	if image.shape[2] == 1:
+		image = image[:, :, 0]
+	ax.imshow(
+		image,
+		extent=extent,
+		interpolation=interpolation,
+		aspect=ax.get_aspect(),
+		**extra_imshow_args,
+	)
+	if reset_extent:
+		ax.axis((xmin, xmax, ymin, ymax))
+	else:
+		ax.axis((
+			min(xmin, extent[0]),
+			max(xmax, extent[1]),
+			min(ymin, extent[2]),
+			max(ymax, extent[3]),
+		))
+
+	if attribution:
+		ctx.add_attribution(ax, attribution, font_size=attribution_size)
+
+
 def _plot_with_basemap(self, *args, basemap=False, **kwargs, ):
 	"""
 	Plot a GeoDataFrame.
@@ -1,68 +1,610 @@
 # -*- coding: utf-8 -*-
 
 import appdirs
-import joblib
-import requests
 import re
-import contextily as ctx
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import threading
+import contextlib
+import collections
 
 cache_dir = None
 memory = None
+tile_cache = None
+_configured = False
 
-ctx.tile.USER_AGENT = "contextily-mapped-py"
+DEFAULT_MAX_BYTES = 2 * 1024**3
 
-def _get_tile_urls(providers):
-	urls = []
+
+class TileCache:
+	"""
+	A size-bounded on-disk store of raw map tile images.
+
+	Tiles are keyed by (provider, z, x, y), and the image bytes are
+	stored exactly as they were received from the tile server, without
+	pickling or re-compression.  Image files are content-addressed by
+	their SHA-1 digest, so identical tiles (open water, empty land,
+	etc.) that appear at many keys are only stored once.  A small
+	SQLite index maps keys to digests and tracks fetch and access
+	times, which are used for age-based expiry and least-recently-used
+	eviction once the store exceeds its byte budget.
+
+	Parameters
+	----------
+	location : Path-like
+		The directory in which to store the tiles.
+	max_bytes : int, optional
+		The maximum total size of the stored tile images.  When this
+		is exceeded, least recently used tiles are evicted until the
+		store is back under 90% of this budget.  Set to None for an
+		unbounded store.
+	max_age : float, optional
+		The maximum age, in seconds, of a stored tile.  Older tiles are
+		treated as missing and removed.
+	timeout : float, default 30
+		How long, in seconds, to wait for another process writing to
+		the same store before giving up with `sqlite3.OperationalError`.
+
+	Several processes may share one store.  Writes take the database
+	write lock up front, and the total size is kept in the database
+	alongside the blobs it counts, so the byte budget holds across all
+	of them.
+	"""
+
+	def __init__(self, location, max_bytes=DEFAULT_MAX_BYTES, max_age=None, timeout=30):
+		self.location = os.fspath(location)
+		self.max_bytes = max_bytes
+		self.max_age = max_age
+		self._lock = threading.RLock()
+		os.makedirs(os.path.join(self.location, 'blobs'), exist_ok=True)
+		self._db = sqlite3.connect(
+			os.path.join(self.location, 'index.sqlite'),
+			timeout=timeout,
+			check_same_thread=False,
+			isolation_level=None,
+		)
+		self._db.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+		self._db.execute("PRAGMA journal_mode=WAL")
+		self._db.execute("PRAGMA synchronous=NORMAL")
+		with self._write():
+			self._db.execute(
+				"CREATE TABLE IF NOT EXISTS tiles ("
+				"provider TEXT, z INTEGER, x INTEGER, y INTEGER, "
+				"digest TEXT, fetched REAL, accessed REAL, "
+				"PRIMARY KEY (provider, z, x, y))"
+			)
+			self._db.execute(
+				"CREATE TABLE IF NOT EXISTS blobs ("
+				"digest TEXT PRIMARY KEY, size INTEGER, refs INTEGER)"
+			)
+			self._db.execute("CREATE INDEX IF NOT EXISTS tiles_accessed ON tiles (accessed)")
+			# running total of blob sizes, kept in step with the blobs table
+			self._db.execute(
+				"CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER)"
+			)
+			self._db.execute(
+				"INSERT OR IGNORE INTO stats "
+				"SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM blobs"
+			)
+
+	@contextlib.contextmanager
+	def _write(self):
+		"""
+		Run a write transaction, taking the database write lock at the start.
+
+		A deferred transaction only takes the write lock at its first
+		write, and fails at once if another process holds it then;
+		`BEGIN IMMEDIATE` instead waits for it, up to the busy timeout.
+		"""
+		with self._lock:
+			self._db.execute("BEGIN IMMEDIATE")
+			try:
+				yield
+			except:
+				self._db.execute("ROLLBACK")
+				raise
+			self._db.execute("COMMIT")
+
+	@property
+	def total_bytes(self):
+		"""
+		The total size of the stored tile images, from all processes.
+		"""
+		with self._lock:
+			return self._read_total()
+
+	def _read_total(self):
+		return self._db.execute("SELECT value FROM stats WHERE name='total_bytes'").fetchone()[0]
+
+	def _add_bytes(self, n):
+		self._db.execute("UPDATE stats SET value=value+? WHERE name='total_bytes'", (n,))
+
+	def __repr__(self):
+		return f"<mapped.caching.TileCache {self.location!r}, {self.total_bytes} bytes>"
+
+	def __len__(self):
+		with self._lock:
+			return self._db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+	def __contains__(self, key):
+		provider, z, x, y = key
+		with self._lock:
+			row = self._db.execute(
+				"SELECT fetched FROM tiles WHERE provider=? AND z=? AND x=? AND y=?",
+				(provider, z, x, y),
+			).fetchone()
+		return row is not None and not self._expired(row[0])
+
+	def _blob_path(self, digest):
+		return os.path.join(self.location, 'blobs', digest[:2], digest)
+
+	def _expired(self, fetched, now=None):
+		if self.max_age is None:
+			return False
+		if now is None:
+			now = time.time()
+		return (now - fetched) > self.max_age
+
+	def get(self, provider, z, x, y):
+		"""
+		Read a tile image from the store.
+
+		Parameters
+		----------
+		provider : str
+		z, x, y : int
+
+		Returns
+		-------
+		bytes or None
+			The raw image bytes, or None if the tile is not stored
+			or has expired.
+		"""
+		now = time.time()
+		with self._lock:
+			row = self._db.execute(
+				"SELECT digest, fetched FROM tiles WHERE provider=? AND z=? AND x=? AND y=?",
+				(provider, z, x, y),
+			).fetchone()
+			if row is None:
+				return None
+			digest, fetched = row
+			if self._expired(fetched, now):
+				self._delete_keys([(provider, z, x, y, digest)])
+				return None
+			try:
+				with open(self._blob_path(digest), 'rb') as f:
+					content = f.read()
+			except FileNotFoundError:
+				self._delete_keys([(provider, z, x, y, digest)])
+				return None
+			try:
+				self._db.execute(
+					"UPDATE tiles SET accessed=? WHERE provider=? AND z=? AND x=? AND y=?",
+					(now, provider, z, x, y),
+				)
+			except sqlite3.OperationalError:
+				pass  # the access time only guides eviction
+		return content
+
+	def put(self, provider, z, x, y, content):
+		"""
+		Write a tile image into the store.
+
+		Parameters
+		----------
+		provider : str
+		z, x, y : int
+		content : bytes
+			The raw image bytes.
+		"""
+		content = bytes(content)
+		digest = hashlib.sha1(content).hexdigest()
+		now = time.time()
+		with self._write():
+			old = self._db.execute(
+				"SELECT digest FROM tiles WHERE provider=? AND z=? AND x=? AND y=?",
+				(provider, z, x, y),
+			).fetchone()
+			if old is not None and old[0] == digest:
+				self._db.execute(
+					"UPDATE tiles SET fetched=?, accessed=? WHERE provider=? AND z=? AND x=? AND y=?",
+					(now, now, provider, z, x, y),
+				)
+				return
+			if old is not None:
+				self._release_blob(old[0])
+			blob = self._db.execute("SELECT refs FROM blobs WHERE digest=?", (digest,)).fetchone()
+			if blob is None:
+				path = self._blob_path(digest)
+				os.makedirs(os.path.dirname(path), exist_ok=True)
+				tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+				with open(tmp, 'wb') as f:
+					f.write(content)
+				os.replace(tmp, path)
+				self._db.execute("INSERT INTO blobs VALUES (?, ?, 1)", (digest, len(content)))
+				self._add_bytes(len(content))
+			else:
+				self._db.execute("UPDATE blobs SET refs=refs+1 WHERE digest=?", (digest,))
+			self._db.execute(
+				"INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?)",
+				(provider, z, x, y, digest, now, now),
+			)
+			over = self.max_bytes is not None and self._read_total() > self.max_bytes
+		if over:
+			self.evict()
+
+	def _release_blob(self, digest):
+		"""
+		Drop one reference to a blob, and return the bytes this frees.
+		"""
+		self._db.execute("UPDATE blobs SET refs=refs-1 WHERE digest=?", (digest,))
+		row = self._db.execute("SELECT refs, size FROM blobs WHERE digest=?", (digest,)).fetchone()
+		if row is not None and row[0] <= 0:
+			self._db.execute("DELETE FROM blobs WHERE digest=?", (digest,))
+			self._add_bytes(-row[1])
+			try:
+				os.remove(self._blob_path(digest))
+			except FileNotFoundError:
+				pass
+			return row[1]
+		return 0
+
+	def _delete_keys(self, rows, target_bytes=None):
+		"""
+		Delete tiles in one transaction.
+
+		If `target_bytes` is given, stop once the store holds no more
+		than that many bytes.  Returns the store size afterwards.
+		"""
+		with self._write():
+			total = self._read_total()
+			for provider, z, x, y, digest in rows:
+				if target_bytes is not None and total <= target_bytes:
+					break
+				# another process may have replaced or removed the tile
+				deleted = self._db.execute(
+					"DELETE FROM tiles WHERE provider=? AND z=? AND x=? AND y=? AND digest=?",
+					(provider, z, x, y, digest),
+				).rowcount
+				if deleted:
+					total -= self._release_blob(digest)
+		return total
+
+	def evict(self, target_bytes=None):
+		"""
+		Remove expired tiles, and then least recently used tiles.
+
+		Parameters
+		----------
+		target_bytes : int, optional
+			Evict tiles until the store holds no more than this many
+			bytes.  Defaults to 90% of `max_bytes`.
+		"""
+		with self._lock:
+			if self.max_age is not None:
+				expired = self._db.execute(
+					"SELECT provider, z, x, y, digest FROM tiles WHERE fetched < ?",
+					(time.time() - self.max_age,),
+				).fetchall()
+				if expired:
+					self._delete_keys(expired)
+			if target_bytes is None:
+				if self.max_bytes is None:
+					return
+				target_bytes = int(self.max_bytes * 0.9)
+			while self._read_total() > target_bytes:
+				batch = self._db.execute(
+					"SELECT provider, z, x, y, digest FROM tiles ORDER BY accessed LIMIT 256"
+				).fetchall()
+				if not batch:
+					break
+				if self._delete_keys(batch, target_bytes) <= target_bytes:
+					break
+
+	def clear(self):
+		"""
+		Remove all tiles from the store.
+		"""
+		self.evict(target_bytes=0)
+
+
+class MemoryLRU:
+	"""
+	An in-memory least-recently-used cache with a byte budget.
+
+	Parameters
+	----------
+	max_bytes : int
+		The maximum total size of cached values.  Least recently
+		used values are dropped when this is exceeded.
+	sizeof : callable, optional
+		A function giving the size in bytes of a cached value.
+		Defaults to the `nbytes` attribute of the value, or the
+		sum of `nbytes` over the items of a tuple.
+	"""
+
+	def __init__(self, max_bytes, sizeof=None):
+		self.max_bytes = max_bytes
+		self.sizeof = sizeof if sizeof is not None else self._nbytes
+		self.total_bytes = 0
+		self._data = collections.OrderedDict()
+		self._lock = threading.Lock()
+
+	@staticmethod
+	def _nbytes(value):
+		if isinstance(value, tuple):
+			return sum(getattr(v, 'nbytes', 0) for v in value)
+		return getattr(value, 'nbytes', 0)
+
+	def __len__(self):
+		return len(self._data)
+
+	def __contains__(self, key):
+		return key in self._data
+
+	def get(self, key, default=None):
+		with self._lock:
+			try:
+				value, size = self._data[key]
+			except KeyError:
+				return default
+			self._data.move_to_end(key)
+			return value
+
+	def put(self, key, value):
+		size = self.sizeof(value)
+		with self._lock:
+			if key in self._data:
+				self.total_bytes -= self._data.pop(key)[1]
+			if size > self.max_bytes:
+				return
+			self._data[key] = (value, size)
+			self.total_bytes += size
+			while self.total_bytes > self.max_bytes:
+				_, (_, old_size) = self._data.popitem(last=False)
+				self.total_bytes -= old_size
+
+	def resize(self, max_bytes):
+		with self._lock:
+			self.max_bytes = max_bytes
+			while self.total_bytes > self.max_bytes and self._data:
+				_, (_, old_size) = self._data.popitem(last=False)
+				self.total_bytes -= old_size
+
+	def clear(self):
+		with self._lock:
+			self._data.clear()
+			self.total_bytes = 0
+
+
+_url_index = {}
+_url_registry = {}
+
+_TOKENS = {i: f"\x00{i}\x00" for i in "xyzs"}
+
+
+def _split_url(url):
+	scheme, rest = url.split("://", 1) if "://" in url else ("", url)
+	host, _, path = rest.partition("/")
+	path, _, query = path.partition("?")
+	return scheme.lower(), host.lower(), "/" + path, query
+
+
+def add_cacheable_url(url, name=None, subdomains="abc"):
+	"""
+	Register a url pattern whose responses should be cached.
+
+	Parameters
+	----------
+	url : str
+		A url template.  If it contains `{z}`, `{x}` and `{y}`
+		placeholders, matching requests are treated as map tiles and
+		stored in the tile cache under the key (name, z, x, y).
+		Otherwise the url is treated as a prefix, and any request
+		starting with it is cached with `joblib.Memory`.  A `{s}`
+		placeholder in the host name is expanded to each of the
+		`subdomains`.  The query string is ignored, unless it holds
+		the tile placeholders.
+	name : str, optional
+		The provider name used to key cached tiles.  Defaults
+		to `url`.
+	subdomains : str or list of str, default "abc"
+		Values for the `{s}` placeholder.
+	"""
+	_ensure_url_index()
+	if name is None:
+		name = url
+	remove_cacheable_url(url)
+	template = url.format(**_TOKENS, r="")
+	scheme, host, path, query = _split_url(template)
+	with_query = (
+		not all(_TOKENS[i] in path for i in "xyz")
+		and all(_TOKENS[i] in f"{path}?{query}" for i in "xyz")
+	)
+	if with_query:
+		path = f"{path}?{query}"
+	is_tile = all(_TOKENS[i] in path for i in "xyz")
+	path = re.escape(path)
+	if is_tile:
+		path = path.replace(_TOKENS['s'], "[^/]+")
+		for i in "xyz":
+			path = path.replace(_TOKENS[i], f"(?P<{i}>[0-9]+)", 1)
+			path = path.replace(_TOKENS[i], "[0-9]+")
+	entry = (name, re.compile("^" + path), is_tile, with_query)
+	if _TOKENS['s'] in host:
+		hosts = [host.replace(_TOKENS['s'], s) for s in subdomains]
+	else:
+		hosts = [host]
+	for h in hosts:
+		_url_index.setdefault((scheme, h), []).append(entry)
+	_url_registry[url] = (hosts, scheme, entry)
+
+
+def remove_cacheable_url(url):
+	"""
+	Unregister a url pattern previously added with `add_cacheable_url`.
+
+	Parameters
+	----------
+	url : str
+		The url template, exactly as it was registered.
+
+	Returns
+	-------
+	bool
+		Whether the url template was found.
+	"""
+	_ensure_url_index()
+	try:
+		hosts, scheme, entry = _url_registry.pop(url)
+	except KeyError:
+		return False
+	for h in hosts:
+		entries = _url_index.get((scheme, h), [])
+		if entry in entries:
+			entries.remove(entry)
+		if not entries:
+			_url_index.pop((scheme, h), None)
+	return True
+
+
+def cacheable_urls():
+	"""
+	List the registered cacheable url templates.
+	"""
+	_ensure_url_index()
+	return list(_url_registry)
+
+
+def _add_provider_urls(providers):
 	for k in providers.keys():
 		if isinstance(providers[k], dict):
-			urls.extend(_get_tile_urls(providers[k]))
+			_add_provider_urls(providers[k])
 			url = providers[k].get('url', None)
 			if url is not None:
 				subdomains = providers[k].get("subdomains", "abc")
-				if not isinstance(subdomains, str):
-					subdomains = "".join(subdomains)
-				s = "["+subdomains+"]"
-				fmt = dict(
-					x="[0-9]*",
-					y="[0-9]*",
-					z="[0-9]*",
-					s=s,
-					r = providers[k].get("r", ""),
-				)
-				url = url.format(**fmt, **providers[k])
-				url = url.split("?")[0]
-				url = "(^"+url+")"
-				urls.append(url)
-	return urls
+				fmt = {
+					**providers[k],
+					**_TOKENS,
+					'r': providers[k].get("r", ""),
+				}
+				try:
+					template = url.format(**fmt)
+				except (KeyError, IndexError):
+					continue
+				for i in "xyzs":
+					template = template.replace(_TOKENS[i], "{"+i+"}")
+				add_cacheable_url(template, name=providers[k].get('name', k), subdomains=subdomains)
+
+_url_index_built = False
+
+def _ensure_url_index():
+	# the provider urls are registered on first use, as loading
+	# contextily and walking all its providers is slow
+	global _url_index_built
+	if _url_index_built:
+		return
+	_url_index_built = True
+	import contextily as ctx
+	_add_provider_urls(ctx.providers)
+	add_cacheable_url("https://nominatim.openstreetmap.org/search")
+	add_cacheable_url("http://overpass-api.de/api")
+
+
+def _match_url(url):
+	"""
+	Find the registered pattern matching a url.
+
+	Returns
+	-------
+	match : re.Match or None
+	name : str or None
+	is_tile : bool
+	"""
+	if not isinstance(url, str):
+		return None, None, False
+	_ensure_url_index()
+	scheme, host, path, query = _split_url(url)
+	entries = _url_index.get((scheme, host))
+	if entries:
+		for name, pattern, is_tile, with_query in entries:
+			m = pattern.match(f"{path}?{query}" if with_query else path)
+			if m:
+				return m, name, is_tile
+	return None, None, False
+
+
+def _tile_key(url):
+	"""
+	Find the (provider, z, x, y) key for a tile url.
+
+	Returns
+	-------
+	tuple or None
+		None is returned if the url is not recognized as a map tile.
+	"""
+	m, name, is_tile = _match_url(url)
+	if m is None or not is_tile:
+		return None
+	return name, int(m.group('z')), int(m.group('x')), int(m.group('y'))
 
-_tile_urls = _get_tile_urls(ctx.providers)
-_nominatim = [
-	"(^https://nominatim.openstreetmap.org/search)",
-	"(^http://overpass-api.de/api)",
-]
-_map_url_filter = re.compile("|".join(_tile_urls+_nominatim))
+
+def _cached_response(url, content):
+	import requests
+	response = requests.models.Response()
+	response._content = content
+	response.status_code = 200
+	response.reason = 'OK'
+	response.url = url
+	response.encoding = None
+	return response
 
 
 def get_with_cache(url, *args, **kwrags):
-	global _map_url_filter
-	if _map_url_filter.match(url):
+	import requests
+	m, name, is_tile = _match_url(url)
+	if m is None:
+		return requests._get_orig(url, *args, **kwrags)
+	elif is_tile and tile_cache is not None:
+		key = name, int(m.group('z')), int(m.group('x')), int(m.group('y'))
+		content = tile_cache.get(*key)
+		if content is not None:
+			return _cached_response(url, content)
+		response = requests._get_orig(url, *args, **kwrags)
+		if response.status_code == 200:
+			try:
+				tile_cache.put(*key, response.content)
+			except sqlite3.Error:
+				pass  # a failure to cache should not fail the download
+		return response
+	elif not is_tile:
 		return requests._get_cached(url, *args, **kwrags)
 	else:
 		return requests._get_orig(url, *args, **kwrags)
 
 def post_with_cache(url, *args, **kwrags):
-	global _map_url_filter
-	if _map_url_filter.match(url):
+	import requests
+	m, name, is_tile = _match_url(url)
+	if m is not None and not is_tile:
 		return requests._post_cached(url, *args, **kwrags)
 	else:
 		return requests._post_orig(url, *args, **kwrags)
 
 
 
-def set_cache_dir(location=None, compress=True, verbose=0, **kwargs):
+def set_cache_dir(location=None, compress=True, verbose=0, max_bytes=DEFAULT_MAX_BYTES, max_age=None, **kwargs):
 	"""
 	Set up a cache directory.
 
+	Map tiles are stored as raw image bytes in a size-bounded
+	`TileCache` in the "tiles" subdirectory of this location.  Other
+	cacheable requests (geocoding lookups, etc.) are cached using
+	`joblib.Memory`.
+
 	Parameter
 	---------
 	location : Path-like or False, optional
@@ -73,8 +615,19 @@ def set_cache_dir(location=None, compress=True, verbose=0, **kwargs):
 		see `joblib.Memory`.
 	verbose : int, default 0
 		see `joblib.Memory`.
+	max_bytes : int, default 2 GiB
+		The maximum total size of cached map tiles. Set to None
+		for an unbounded tile cache.
+	max_age : float, optional
+		The maximum age of cached map tiles, in seconds.
 	"""
-	global memory, cache_dir
+	global memory, cache_dir, tile_cache, _configured
+	import joblib
+	import requests
+	import contextily as ctx
+
+	ctx.tile.USER_AGENT = "contextily-mapped-py"
+	_configured = True
 
 	if location is None:
 		location = appdirs.user_cache_dir('mapped')
@@ -82,7 +635,12 @@ def set_cache_dir(location=None, compress=True, verbose=0, **kwargs):
 	if location is False:
 		location = None
 
+	cache_dir = location
 	memory = joblib.Memory(location, compress=compress, verbose=verbose, **kwargs)
+	if location is None:
+		tile_cache = None
+	else:
+		tile_cache = TileCache(os.path.join(location, 'tiles'), max_bytes=max_bytes, max_age=max_age)
 
 	make_cache = (
 		(requests, 'get', get_with_cache),
@@ -98,6 +656,180 @@ def set_cache_dir(location=None, compress=True, verbose=0, **kwargs):
 		setattr(module, f"_{func_name}_cached", memory.cache(func))
 		setattr(module, func_name, replace_func)
 
-set_cache_dir()
+
+def _ensure_cache():
+	"""
+	Set up the default cache directory, unless it is already configured.
+
+	This is called on first use of anything that needs the cache, so that
+	importing mapped stays fast.
+	"""
+	if not _configured:
+		set_cache_dir()
+
+
+def _print_progress(done, total, downloaded, failed):
+	print(
+		f"\rseeding tiles: {done}/{total} checked, {downloaded} downloaded, {failed} failed",
+		end="" if done < total else "\n",
+		file=sys.stderr,
+		flush=True,
+	)
+
+
+def seed_cache(bounds, tiles='CartoDB.Positron', zoom=(0, 14), crs=None, max_workers=16, progress=True):
+	"""
+	Download all the map tiles for an area into the tile cache.
+
+	Tiles already in the cache are skipped, so an interrupted run
+	can be resumed by simply calling this function again.
+
+	Parameters
+	----------
+	bounds : array-like or GeoData
+		This either provides boundaries of the area in
+		(left, bottom, right, top) format, or is an object
+		with a `total_bounds` property that gives same.
+	tiles : str or dict, default 'CartoDB.Positron'
+		The tile provider, by name or url, as for `add_basemap`.
+	zoom : int or (int, int), default (0, 14)
+		A zoom level, or an inclusive range of zoom levels.
+	crs : any, optional
+		The coordinate reference system of `bounds`.  Defaults to
+		the `crs` of `bounds` if it has one, or web mercator.
+	max_workers : int, default 16
+		The number of tiles to download concurrently.  Connections
+		to each host are also limited by `mapped.tiles.host_limits`.
+	progress : bool or callable, default True
+		Whether to print progress to stderr.  Give a function to
+		receive the progress instead, it will be called as
+		`progress(done, total, downloaded, failed)`.
+
+	Returns
+	-------
+	dict
+		Counts of tiles "total", "cached", "downloaded" and "failed".
+	"""
+	from concurrent.futures import ThreadPoolExecutor, as_completed
+	from rasterio.warp import transform_bounds
+	from pyproj import CRS
+	from . import tiles as _tiles
+
+	_ensure_cache()
+	if tile_cache is None:
+		raise ValueError("caching is disabled, use set_cache_dir to enable it")
+
+	if crs is None:
+		crs = getattr(bounds, 'crs', None)
+	if hasattr(bounds, 'total_bounds'):
+		bounds = bounds.total_bounds
+	left, bottom, right, top = bounds
+	if crs is not None and CRS.from_user_input(crs).to_epsg() != 3857:
+		left, bottom, right, top = transform_bounds(
+			CRS.from_user_input(crs).to_wkt(), "EPSG:3857", left, bottom, right, top,
+		)
+
+	if isinstance(zoom, int):
+		zoom = (zoom, zoom)
+	source, _ = _tiles.resolve_source(tiles)
+	if not isinstance(source, dict) and not (isinstance(source, str) and source[:4] == "http"):
+		raise ValueError(f"cannot seed the cache from tiles={tiles!r}")
+	name = _tiles.provider_name(source)
+	zooms = range(
+		_tiles._validate_zoom(zoom[0], source),
+		_tiles._validate_zoom(zoom[1], source) + 1,
+	)
+
+	if progress is True:
+		progress = _print_progress
+
+	total = 0
+	for z in zooms:
+		x0, x1, y0, y1 = _tiles.tile_range(left, bottom, right, top, z)
+		total += (x1 - x0 + 1) * (y1 - y0 + 1)
+
+	fetcher = _tiles.TileFetcher(max_workers=max_workers)
+	done = cached = downloaded = failed = 0
+	chunk_size = max_workers * 64
+
+	def _missing():
+		nonlocal done, cached
+		for z in zooms:
+			for t in _tiles.tiles_for_bounds(left, bottom, right, top, z):
+				if (name, *t) in tile_cache:
+					done += 1
+					cached += 1
+				else:
+					yield t
+
+	try:
+		with ThreadPoolExecutor(max_workers=max_workers) as pool:
+			chunk = []
+			pending = _missing()
+			while True:
+				chunk.clear()
+				for t in pending:
+					chunk.append(t)
+					if len(chunk) >= chunk_size:
+						break
+				if not chunk:
+					break
+				futures = [pool.submit(fetcher.fetch_one, source, *t) for t in chunk]
+				for future in as_completed(futures):
+					done += 1
+					if future.exception() is None:
+						downloaded += 1
+					else:
+						failed += 1
+					if progress and done % 100 == 0:
+						progress(done, total, downloaded, failed)
+	finally:
+		fetcher.close()
+	if progress:
+		progress(done, total, downloaded, failed)
+	return dict(total=total, cached=cached, downloaded=downloaded, failed=failed)
+
+
+def main(argv=None):
+	"""
+	Command line entry point for seeding the tile cache.
+	"""
+	import argparse
+	parser = argparse.ArgumentParser(
+		prog="mapped-seed",
+		description="Download map tiles for an area into the mapped tile cache.",
+	)
+	area = parser.add_mutually_exclusive_group(required=True)
+	area.add_argument("--bbox", nargs=4, type=float, metavar=("LEFT", "BOTTOM", "RIGHT", "TOP"))
+	area.add_argument("--file", help="a file readable by geopandas, whose total bounds are used")
+	parser.add_argument("--crs", default=None, help="crs of --bbox (default: web mercator)")
+	parser.add_argument("--tiles", default="CartoDB.Positron")
+	parser.add_argument("--zoom", nargs=2, type=int, default=(0, 14), metavar=("MIN", "MAX"))
+	parser.add_argument("--workers", type=int, default=16)
+	parser.add_argument("--cache-dir", default=None)
+	parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+	args = parser.parse_args(argv)
+
+	if args.cache_dir is not None or args.max_bytes != DEFAULT_MAX_BYTES:
+		set_cache_dir(args.cache_dir, max_bytes=args.max_bytes)
+	if args.file is not None:
+		import geopandas as gpd
+		bounds = gpd.read_file(args.file)
+	else:
+		bounds = args.bbox
+	result = seed_cache(
+		bounds,
+		tiles=args.tiles,
+		zoom=tuple(args.zoom),
+		crs=args.crs,
+		max_workers=args.workers,
+	)
+	print(
+		f"{result['total']} tiles: {result['cached']} already cached, "
+		f"{result['downloaded']} downloaded, {result['failed']} failed"
+	)
+	return 1 if result['failed'] else 0
 
 
+if __name__ == "__main__":
+	sys.exit(main())
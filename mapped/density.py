@@ -3,10 +3,74 @@ import numpy as np
 import pandas as pd
 import geopandas as gpd
 import warnings
+from pyproj import CRS
 from sklearn.neighbors import KernelDensity
 from sklearn.base import clone
 from matplotlib import pyplot as plt
+from . import caching
 from .basemap import add_basemap
+from .caching import MemoryLRU
+
+def _grid_spec(bounds=None, num=50, crs=None, numx=None, numy=None, resolution=None, xlim=None, ylim=None):
+	"""
+	Interpret the arguments defining a mesh grid.
+
+	Returns
+	-------
+	bounds : (x0, y0, x1, y1)
+	crs
+	numx, numy : int
+	"""
+	if bounds is None:
+		if isinstance(xlim, slice):
+			x0, x1 = xlim.start, xlim.stop
+		else:
+			x0, x1 = xlim
+		if isinstance(ylim, slice):
+			y0, y1 = ylim.start, ylim.stop
+		else:
+			y0, y1 = ylim
+	elif isinstance(bounds, (np.ndarray, list, tuple)) and len(bounds) == 4:
+		x0, y0, x1, y1 = bounds
+	else:
+		x0, y0, x1, y1 = bounds.total_bounds
+
+	if crs is None and hasattr(bounds, 'crs'):
+		crs = bounds.crs
+
+	if resolution is not None:
+		xy_ratio = (x1 - x0) / (y1 - y0)
+		numy = int(np.sqrt((resolution ** 2) / xy_ratio))
+		numx = int((resolution ** 2) / numy)
+
+	if numx is None:
+		numx = num
+	if numy is None:
+		numy = num
+
+	return (x0, y0, x1, y1), crs, numx, numy
+
+
+def _draw_contour(x, y, z, ax=None, levels=None, filled=False, basemap=None, crs=None, figsize=None, **kwargs):
+	"""
+	Draw contours of gridded values, optionally over a basemap.
+	"""
+	if ax is None:
+		fig, ax = plt.subplots(figsize=figsize)
+		ax.set_aspect("equal")
+
+	func = ax.contourf if filled else ax.contour
+	func(x, y, z, levels=levels, **kwargs)
+
+	if isinstance(basemap, str):
+		basemap = {'crs': crs, 'tiles': basemap}
+	if basemap is True or basemap is 1:
+		basemap = {'crs': crs}
+	if basemap:
+		ax = add_basemap(ax, **basemap)
+
+	return ax
+
 
 class GeoMeshGrid(gpd.GeoDataFrame):
 	"""
@@ -49,32 +113,10 @@ class GeoMeshGrid(gpd.GeoDataFrame):
 			super().__init__(*args)
 		else:
 
-			if bounds is None:
-				if isinstance(xlim, slice):
-					x0, x1 = xlim.start, xlim.stop
-				else:
-					x0, x1 = xlim
-				if isinstance(ylim, slice):
-					y0, y1 = ylim.start, ylim.stop
-				else:
-					y0, y1 = ylim
-			elif isinstance(bounds, (np.ndarray, list, tuple)) and len(bounds) == 4:
-				x0, y0, x1, y1 = bounds
-			else:
-				x0, y0, x1, y1 = bounds.total_bounds
-
-			if crs is None and hasattr(bounds, 'crs'):
-				crs = bounds.crs
-
-			if resolution is not None:
-				xy_ratio = (x1 - x0) / (y1 - y0)
-				numy = int(np.sqrt((resolution ** 2) / xy_ratio))
-				numx = int((resolution ** 2) / numy)
-
-			if numx is None:
-				numx = num
-			if numy is None:
-				numy = num
+			(x0, y0, x1, y1), crs, numx, numy = _grid_spec(
+				bounds=bounds, num=num, crs=crs, numx=numx, numy=numy,
+				resolution=resolution, xlim=xlim, ylim=ylim,
+			)
 
 			gX, gY = np.meshgrid(
 				np.linspace(x0, x1, numx),
@@ -110,12 +152,6 @@ class GeoMeshGrid(gpd.GeoDataFrame):
 	):
 		shape = self.gridshape
 
-		if ax is None:
-			fig, ax = plt.subplots(figsize=figsize)
-			ax.set_aspect("equal")
-
-		func = ax.contourf if filled else ax.contour
-
 		try:
 			z = self[column]
 		except KeyError:
@@ -131,28 +167,659 @@ class GeoMeshGrid(gpd.GeoDataFrame):
 			z = z.copy()
 			z[~mask] = np.nan
 
-		func(
+		if crs is None:
+			crs = getattr(self, 'crs', crs)
+
+		return _draw_contour(
 			self.geometry.x.values.reshape(shape),
 			self.geometry.y.values.reshape(shape),
 			z.values.reshape(shape),
+			ax=ax,
 			levels=levels,
+			filled=filled,
+			basemap=basemap,
+			crs=crs,
+			figsize=figsize,
 			**kwargs,
 		)
 
+
+
+
+class ArrayMeshGrid:
+	"""
+	A lightweight grid of points, stored only as its axis vectors.
+
+	This is an alternative to `GeoMeshGrid` for large grids.  It holds
+	the x and y axis vectors, the crs and values computed on the grid
+	(as 2-d arrays), and only creates point geometries if asked, by
+	`to_geodataframe`.  Longitude and latitude are found by transforming
+	just the 1-d axes when the projection allows it (as for web
+	mercator), or all the grid coordinates at once with pyproj
+	otherwise.  All initialization arguments must be given as keyword
+	parameters, as for `GeoMeshGrid`.
+
+	Values are set and retrieved like columns, e.g. `mesh['Z'] = z`,
+	and are stored with shape `gridshape`.
+	"""
+
+	def __init__(self, *, bounds=None, num=50, crs=None, numx=None, numy=None, resolution=None, xlim=None, ylim=None):
+		(x0, y0, x1, y1), crs, numx, numy = _grid_spec(
+			bounds=bounds, num=num, crs=crs, numx=numx, numy=numy,
+			resolution=resolution, xlim=xlim, ylim=ylim,
+		)
+		self.x = np.linspace(x0, x1, numx)
+		self.y = np.linspace(y0, y1, numy)
+		self.crs = None if crs is None else CRS.from_user_input(crs)
+		self.columns = {}
+		self.attrs = {}
+		self._lonlat = None
+
+	@property
+	def gridshape(self):
+		return (len(self.y), len(self.x))
+
+	@property
+	def total_bounds(self):
+		return np.array([self.x[0], self.y[0], self.x[-1], self.y[-1]])
+
+	def __len__(self):
+		return len(self.x) * len(self.y)
+
+	def __getitem__(self, name):
+		return self.columns[name]
+
+	def __setitem__(self, name, values):
+		self.columns[name] = np.asarray(values).reshape(self.gridshape)
+
+	def __contains__(self, name):
+		return name in self.columns
+
+	def keys(self):
+		return self.columns.keys()
+
+	def copy(self):
+		other = object.__new__(type(self))
+		other.__dict__.update(self.__dict__)
+		other.columns = dict(self.columns)
+		other.attrs = dict(self.attrs)
+		return other
+
+	def xy(self):
+		"""
+		The grid coordinates as 2-d arrays.
+
+		Returns
+		-------
+		x, y : ndarray
+			Arrays of shape `gridshape`.
+		"""
+		return np.meshgrid(self.x, self.y)
+
+	def lonlat(self):
+		"""
+		The longitude and latitude of the grid points, in degrees.
+
+		Returns
+		-------
+		lon, lat : ndarray
+			Arrays of shape `gridshape`.
+		"""
+		if self._lonlat is None:
+			self._lonlat = _grid_lonlat(self.x, self.y, self.crs)
+		return self._lonlat
+
+	def latlon_radians(self):
+		"""
+		The latitude and longitude of the grid points, in radians.
+
+		Returns
+		-------
+		ndarray
+			Shape (n, 2) array, in the order used by the haversine metric.
+		"""
+		lon, lat = self.lonlat()
+		return np.radians(np.column_stack([lat.ravel(), lon.ravel()]))
+
+	def to_geodataframe(self):
+		"""
+		Convert to a GeoMeshGrid, creating a point geometry for every cell.
+
+		Returns
+		-------
+		GeoMeshGrid
+		"""
+		numy, numx = self.gridshape
+		mesh = GeoMeshGrid(bounds=self.total_bounds, numx=numx, numy=numy, crs=self.crs)
+		for name, values in self.columns.items():
+			mesh[name] = values.ravel()
+		mesh.attrs.update(self.attrs)
+		return mesh
+
+	def contour(
+			self,
+			column,
+			ax=None,
+			levels=None,
+			filled=False,
+			basemap=None,
+			crs=None,
+			figsize=None,
+			mask=None,
+			column_mask=None,
+			**kwargs,
+	):
+		"""
+		Draw contours of a column, optionally over a basemap.
+
+		Parameters
+		----------
+		column : str
+		mask : GeoSeries or GeoDataFrame or array-like of bool, optional
+			Only draw contours within these shapes, or where this
+			array (of shape `gridshape`) is True.
+		column_mask : str, optional
+			Only draw contours where this column is True.
+		"""
+		x, y = self.xy()
+		z = np.array(self[column], dtype=float)
+		if column_mask is not None:
+			z[~np.asarray(self[column_mask], dtype=bool)] = np.nan
+		if mask is not None:
+			if isinstance(mask, (gpd.GeoSeries, gpd.GeoDataFrame)):
+				from shapely import contains_xy
+				mask = contains_xy(mask.to_crs(self.crs).unary_union, x, y)
+			z[~np.asarray(mask).reshape(self.gridshape)] = np.nan
 		if crs is None:
-			crs = getattr(self, 'crs', crs)
+			crs = self.crs
+		return _draw_contour(
+			x, y, z,
+			ax=ax,
+			levels=levels,
+			filled=filled,
+			basemap=basemap,
+			crs=crs,
+			figsize=figsize,
+			**kwargs,
+		)
 
-		if isinstance(basemap, str):
-			basemap = {'crs': crs, 'tiles': basemap}
-		if basemap is True or basemap is 1:
-			basemap = {'crs': crs}
-		if basemap:
-			ax = add_basemap(ax, **basemap)
 
-		return ax
+def _grid_lonlat(x, y, crs):
+	"""
+	Longitude and latitude, in degrees, of a grid given by its axes.
 
+	If longitude depends only on x and latitude only on y, as for
+	web mercator and other normal cylindrical projections, only the
+	axes are transformed.  This is checked at the corners and middle
+	of the grid, and if it does not hold all the grid points are
+	transformed.
+	"""
+	from pyproj import Transformer
+	gx, gy = np.meshgrid(x, y, sparse=True)
+	shape = (len(y), len(x))
+	if crs is None or crs.equals(CRS.from_epsg(4326)):
+		return np.broadcast_to(gx, shape).copy(), np.broadcast_to(gy, shape).copy()
+	transformer = Transformer.from_crs(crs, 4326, always_xy=True)
+	lon_x, _ = transformer.transform(x, np.full(len(x), y[len(y) // 2]))
+	_, lat_y = transformer.transform(np.full(len(y), x[len(x) // 2]), y)
+	ix = np.array([0, 0, -1, -1, len(x) // 2])
+	iy = np.array([0, -1, 0, -1, len(y) // 2])
+	lon_c, lat_c = transformer.transform(x[ix], y[iy])
+	if np.allclose(lon_c, lon_x[ix], rtol=0, atol=1e-9) and np.allclose(lat_c, lat_y[iy], rtol=0, atol=1e-9):
+		lon, lat = np.meshgrid(lon_x, lat_y)
+		return lon, lat
+	lon, lat = transformer.transform(np.broadcast_to(gx, shape).ravel(), np.broadcast_to(gy, shape).ravel())
+	return np.asarray(lon).reshape(shape), np.asarray(lat).reshape(shape)
+
+
+def _target_latlon_radians(target, index=None):
+	"""
+	Latitude and longitude in radians of target points or a mesh grid.
+	"""
+	if isinstance(target, ArrayMeshGrid):
+		latlon = target.latlon_radians()
+		return latlon if index is None else latlon[index]
+	geometry = target.geometry
+	if index is not None:
+		geometry = geometry.iloc[index]
+	geometry = geometry.to_crs(epsg=4326)
+	return np.radians(np.vstack([
+		geometry.y.values,
+		geometry.x.values,
+	]).T)
+
+
+def _target_xy(target, crs, index=None):
+	"""
+	Coordinates in a projected crs of target points or a mesh grid.
+	"""
+	from pyproj import Transformer
+	if isinstance(target, ArrayMeshGrid):
+		if index is None:
+			x, y = (a.ravel() for a in target.xy())
+		else:
+			row, col = np.divmod(index, len(target.x))
+			x, y = target.x[col], target.y[row]
+		if target.crs is not None and not target.crs.equals(crs):
+			x, y = Transformer.from_crs(target.crs, crs, always_xy=True).transform(x, y)
+		return np.column_stack([x, y])
+	geometry = target.geometry
+	if index is not None:
+		geometry = geometry.iloc[index]
+	if geometry.crs is not None and not geometry.crs.equals(crs):
+		geometry = geometry.to_crs(crs)
+	return np.column_stack([geometry.x.values, geometry.y.values])
+
+
+# How far out, in bandwidths, kernels with unbounded support are
+# evaluated by the 'fft' engine; beyond this they are below about 1e-5
+# of their peak.
+_KERNEL_SUPPORT = {
+	'gaussian': 5.0,
+	'exponential': 12.0,
+}
+
+
+def _mesh_axes(mesh):
+	"""
+	Get the x and y axis vectors of a mesh grid.
+	"""
+	if isinstance(mesh, ArrayMeshGrid):
+		return mesh.x, mesh.y
+	shape = mesh.gridshape
+	x = mesh.geometry.x.values.reshape(shape)
+	y = mesh.geometry.y.values.reshape(shape)
+	return x[0, :], y[:, 0]
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+	"""
+	Great circle angle in radians between points given in radians.
+	"""
+	a = (
+		np.sin((lat2 - lat1) / 2) ** 2
+		+ np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+	)
+	return 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
 
 
+# The 'fft' engine bins on the mesh lattice itself only if the ground
+# size of a mesh cell varies by no more than this fraction across it.
+FFT_SCALE_TOLERANCE = 0.01
+
+# A warning is issued if the 'fft' engine's check finds a relative error
+# larger than this.
+FFT_WARN_REL_ERROR = 0.05
+
+
+def _fft_density(model, mesh):
+	"""
+	Approximate the density of a fitted model on a mesh grid by FFT.
+
+	The weighted sample points are linearly binned onto a regular
+	lattice (padded by the kernel support), and convolved with the
+	kernel sampled on the lattice.  If the ground size of a mesh cell
+	is nearly the same everywhere on the mesh, the lattice is the mesh
+	itself.  Otherwise, as for web mercator or geographic meshes
+	covering a large area, the lattice is laid out in a local crs where
+	distances are true (the model's projected plane, or an azimuthal
+	equidistant projection centered on the mesh for great circle
+	distances), and the result is interpolated onto the mesh points.
+
+	Returns
+	-------
+	ndarray
+		Shape `mesh.gridshape` array of densities, scaled by the
+		model's total sample weight.
+	"""
+	from pyproj import Transformer
+
+	x, y = _mesh_axes(mesh)
+	ny, nx = len(y), len(x)
+	if nx < 2 or ny < 2:
+		raise ValueError("the 'fft' engine needs a mesh at least 2 points wide and high")
+	dx = (x[-1] - x[0]) / (nx - 1)
+	dy = (y[-1] - y[0]) / (ny - 1)
+
+	# ground size of one cell, in the model's distance units, at the
+	# corners, edge midpoints and middle of the mesh
+	fit_crs = getattr(model, 'fit_crs', None)
+	px_, py_ = np.meshgrid(x[[0, nx // 2, -2]], y[[0, ny // 2, -2]])
+	px_, py_ = px_.ravel(), py_.ravel()
+	corner_x = np.concatenate([px_, px_ + dx, px_])
+	corner_y = np.concatenate([py_, py_, py_ + dy])
+	if fit_crs is None:
+		to_latlon = Transformer.from_crs(mesh.crs, 4326, always_xy=True)
+		lon, lat = np.radians(to_latlon.transform(corner_x, corner_y))
+		lon, lat = lon.reshape(3, -1), lat.reshape(3, -1)
+		cell_x = _haversine(lat[0], lon[0], lat[1], lon[1])
+		cell_y = _haversine(lat[0], lon[0], lat[2], lon[2])
+	else:
+		if not fit_crs.equals(mesh.crs):
+			corner_x, corner_y = Transformer.from_crs(mesh.crs, fit_crs, always_xy=True).transform(corner_x, corner_y)
+		corner_x, corner_y = np.reshape(corner_x, (3, -1)), np.reshape(corner_y, (3, -1))
+		cell_x = np.hypot(corner_x[1] - corner_x[0], corner_y[1] - corner_y[0])
+		cell_y = np.hypot(corner_x[2] - corner_x[0], corner_y[2] - corner_y[0])
+
+	middle = len(cell_x) // 2
+	if (
+		np.ptp(cell_x) <= FFT_SCALE_TOLERANCE * cell_x[middle]
+		and np.ptp(cell_y) <= FFT_SCALE_TOLERANCE * cell_y[middle]
+	):
+		if fit_crs is None:
+			lat, lon = np.degrees(model.fit_latlon_radians).T
+			sx, sy = Transformer.from_crs(4326, mesh.crs, always_xy=True).transform(lon, lat)
+		else:
+			sx, sy = model.fit_xy.T
+			if not fit_crs.equals(mesh.crs):
+				sx, sy = Transformer.from_crs(fit_crs, mesh.crs, always_xy=True).transform(sx, sy)
+		return _fft_lattice(model, sx, sy, x, y, cell_x[middle], cell_y[middle])
+
+	# the cell scale varies across the mesh, so bin in a local crs whose
+	# units are the model's distance units
+	mx, my = np.meshgrid(x, y)
+	if fit_crs is None:
+		from pyproj import Proj
+		lon, lat = Transformer.from_crs(mesh.crs, 4326, always_xy=True).transform(mx.ravel(), my.ravel())
+		# on a unit sphere, to match the model's great circle distances
+		local = Proj(proj='aeqd', lon_0=lon[len(lon) // 2], lat_0=lat[len(lat) // 2], R=1)
+		lx, ly = local(lon, lat)
+		slat, slon = np.degrees(model.fit_latlon_radians).T
+		sx, sy = local(slon, slat)
+	else:
+		lx, ly = Transformer.from_crs(mesh.crs, fit_crs, always_xy=True).transform(mx.ravel(), my.ravel())
+		sx, sy = model.fit_xy.T
+	lx, ly = np.asarray(lx), np.asarray(ly)
+
+	# as fine as the finest mesh cells, but no more than 4 times as
+	# many lattice points as mesh points
+	span_x, span_y = np.ptp(lx), np.ptp(ly)
+	step = min(cell_x.min(), cell_y.min())
+	step = max(step, np.sqrt(span_x * span_y / (4 * nx * ny)))
+	ax_ = lx.min() + np.arange(int(np.ceil(span_x / step)) + 2) * step
+	ay_ = ly.min() + np.arange(int(np.ceil(span_y / step)) + 2) * step
+	z = _fft_lattice(model, sx, sy, ax_, ay_, step, step)
+
+	from scipy.interpolate import RegularGridInterpolator
+	interp = RegularGridInterpolator((ay_, ax_), z, bounds_error=False, fill_value=None)
+	return np.clip(interp(np.column_stack([ly, lx])), 0, None).reshape(ny, nx)
+
+
+def _fft_lattice(model, sx, sy, x, y, cell_x, cell_y):
+	"""
+	Bin sample points onto a lattice and convolve them with the kernel.
+
+	Parameters
+	----------
+	model : GeoKernelDensity
+	sx, sy : array-like
+		The model's sample points, in the lattice's crs.
+	x, y : ndarray
+		The lattice axes, evenly spaced.
+	cell_x, cell_y : float
+		The ground size of a lattice cell, in the model's distance units.
+	"""
+	from scipy.signal import fftconvolve
+
+	nx, ny = len(x), len(y)
+	dx = (x[-1] - x[0]) / (nx - 1)
+	dy = (y[-1] - y[0]) / (ny - 1)
+	bandwidth = model.bandwidth
+	support = bandwidth * _KERNEL_SUPPORT.get(model.kernel, 1.0)
+	px = int(min(np.ceil(support / cell_x), max(nx, ny)))
+	py = int(min(np.ceil(support / cell_y), max(nx, ny)))
+
+	# linear binning onto the padded lattice
+	gx = (np.asarray(sx) - x[0]) / dx + px
+	gy = (np.asarray(sy) - y[0]) / dy + py
+	w = model.fit_sample_weight
+	if w is None:
+		w = np.ones(len(gx))
+	shape = (ny + 2 * py, nx + 2 * px)
+	ok = (gx >= 0) & (gx < shape[1] - 1) & (gy >= 0) & (gy < shape[0] - 1)
+	gx, gy, w = gx[ok], gy[ok], w[ok]
+	ix, iy = np.floor(gx).astype(np.intp), np.floor(gy).astype(np.intp)
+	fx, fy = gx - ix, gy - iy
+	binned = np.zeros(shape)
+	np.add.at(binned, (iy, ix), w * (1 - fx) * (1 - fy))
+	np.add.at(binned, (iy, ix + 1), w * fx * (1 - fy))
+	np.add.at(binned, (iy + 1, ix), w * (1 - fx) * fy)
+	np.add.at(binned, (iy + 1, ix + 1), w * fx * fy)
+
+	# the normalized kernel, evaluated by sklearn so every kernel matches
+	ox, oy = np.meshgrid(np.arange(-px, px + 1) * cell_x, np.arange(-py, py + 1) * cell_y)
+	unit = KernelDensity(kernel=model.kernel, bandwidth=bandwidth).fit(np.zeros((1, 2)))
+	kernel = np.exp(unit.score_samples(np.column_stack([oy.ravel(), ox.ravel()]))).reshape(ox.shape)
+
+	z = fftconvolve(binned, kernel, mode='valid')
+	return np.clip(z, 0, None)
+
+
+def _check_fft(model, mesh, z, check, seed=0):
+	"""
+	Compare 'fft' densities against exact ones at a sample of mesh points.
+	"""
+	z = np.asarray(z).ravel()
+	n = min(int(check), len(z))
+	i = np.random.default_rng(seed).choice(len(z), n, replace=False)
+	exact = np.exp(model.score_samples(model._target_coordinates(mesh, i))) * model.total_sample_weight
+	err = np.abs(z[i] - exact)
+	scale = exact.max() if len(exact) else 0
+	return {
+		'n_checked': n,
+		'max_abs_error': float(err.max()) if n else 0.0,
+		'max_rel_error': float(err.max() / scale) if n and scale > 0 else 0.0,
+	}
+
+
+def _warn_fft_error(error):
+	if error['max_rel_error'] > FFT_WARN_REL_ERROR:
+		warnings.warn(
+			f"the 'fft' engine's densities differ from exact ones by up to "
+			f"{error['max_rel_error']:.1%} of the peak density; use engine='exact' "
+			f"or a finer mesh for a better result",
+			stacklevel=3,
+		)
+
+
+_density_memo = MemoryLRU(128 * 1024**2)
+_density_disk = False
+
+
+def set_density_cache(max_bytes=128 * 1024**2, disk=False):
+	"""
+	Configure the cache of kernel density surfaces evaluated on mesh grids.
+
+	Densities evaluated on a mesh grid are cached, keyed by a
+	fingerprint of the fitted model (its points, weights and kernel
+	parameters), the mesh (its axes and crs) and the engine, so drawing
+	the same surface again, e.g. with different contour levels or
+	colors, does not recompute it.
+
+	Parameters
+	----------
+	max_bytes : int, default 128 MiB
+		The maximum total size of the surfaces kept in memory.  Set to
+		0 to disable and clear the in-memory cache.
+	disk : bool, default False
+		Also keep surfaces on disk, in the "kde" subdirectory of the
+		package cache directory (see `mapped.caching.set_cache_dir`), so
+		they are reused across sessions.
+	"""
+	global _density_disk
+	_density_memo.resize(max_bytes)
+	_density_disk = disk
+
+
+def clear_density_cache(disk=False):
+	"""
+	Clear the cache of kernel density surfaces.
+
+	Parameters
+	----------
+	disk : bool, default False
+		Also delete the surfaces cached on disk.
+	"""
+	_density_memo.clear()
+	if disk:
+		import shutil
+		directory = _density_cache_dir()
+		if directory is not None:
+			shutil.rmtree(directory, ignore_errors=True)
+
+
+def _density_cache_dir():
+	caching._ensure_cache()
+	if caching.cache_dir is None:
+		return None
+	import os
+	return os.path.join(caching.cache_dir, 'kde')
+
+
+def _model_fingerprint(model):
+	"""
+	A digest of everything about a fitted model that affects its densities.
+	"""
+	fingerprint = getattr(model, '_fingerprint', None)
+	if fingerprint is None:
+		import hashlib
+		h = hashlib.sha1()
+		fit_crs = getattr(model, 'fit_crs', None)
+		h.update(repr((
+			model.kernel, float(model.bandwidth), getattr(model, 'effective_metric_', model.metric), model.atol, model.rtol,
+			float(model.total_sample_weight), None if fit_crs is None else fit_crs.to_wkt(),
+		)).encode())
+		coords = model.fit_latlon_radians if fit_crs is None else model.fit_xy
+		h.update(np.ascontiguousarray(coords, dtype=float).tobytes())
+		if model.fit_sample_weight is not None:
+			h.update(np.ascontiguousarray(model.fit_sample_weight, dtype=float).tobytes())
+		fingerprint = model._fingerprint = h.hexdigest()
+	return fingerprint
+
+
+def _density_key(model, mesh, engine):
+	"""
+	The cache key for a model evaluated on a mesh, or None if not cacheable.
+	"""
+	if getattr(mesh, 'gridshape', None) is None:
+		return None
+	if _density_memo.max_bytes <= 0 and not _density_disk:
+		return None
+	import hashlib
+	x, y = _mesh_axes(mesh)
+	h = hashlib.sha1()
+	h.update(_model_fingerprint(model).encode())
+	h.update(engine.encode())
+	h.update(b'' if mesh.crs is None else CRS.from_user_input(mesh.crs).to_wkt().encode())
+	h.update(np.ascontiguousarray(x, dtype=float).tobytes())
+	h.update(np.ascontiguousarray(y, dtype=float).tobytes())
+	return h.hexdigest()
+
+
+def _density_get(key):
+	"""
+	Get a cached (densities, error) pair, or None.
+	"""
+	if key is None:
+		return None
+	hit = _density_memo.get(key)
+	if hit is None and _density_disk:
+		import os, json
+		directory = _density_cache_dir()
+		path = None if directory is None else os.path.join(directory, f"{key}.npz")
+		if path is not None and os.path.exists(path):
+			with np.load(path) as f:
+				error = json.loads(str(f['error']))
+				hit = (f['z'], error)
+			_density_memo.put(key, hit)
+	if hit is None:
+		return None
+	z, error = hit
+	return z.copy(), error
+
+
+def _density_put(key, z, error=None):
+	if key is None:
+		return
+	z = np.array(z)
+	z.flags.writeable = False
+	_density_memo.put(key, (z, error))
+	if _density_disk:
+		import os, json, tempfile
+		directory = _density_cache_dir()
+		if directory is None:
+			return
+		os.makedirs(directory, exist_ok=True)
+		fd, tmp = tempfile.mkstemp(dir=directory, suffix='.npz')
+		try:
+			with os.fdopen(fd, 'wb') as f:
+				np.savez(f, z=z, error=json.dumps(error))
+			os.replace(tmp, os.path.join(directory, f"{key}.npz"))
+		except BaseException:
+			os.unlink(tmp)
+			raise
+
+
+# Fitted models for the current worker process, set once per process by
+# `_init_kde_worker` so they are not sent again with every task.  Only
+# used by the 'processes' backend; threads share the caller's process,
+# so they are handed the models with each task instead.
+_worker_models = None
+
+
+def _init_kde_worker(models):
+	global _worker_models
+	_worker_models = models
+
+
+def _score_block(position, latlon_radians, models=None):
+	if models is None:
+		models = _worker_models
+	model = models[position]
+	return np.exp(model.score_samples(latlon_radians)) * model.total_sample_weight
+
+
+def _score_blocks(models, latlon_radians, n_jobs=None, chunk_size=10_000, backend='processes'):
+	"""
+	Evaluate several fitted models at the same points, in parallel blocks.
+
+	The points are split into blocks of `chunk_size`, and each (model,
+	block) pair is a separate task.  With the 'processes' backend the
+	models are given to each worker process once, when it starts, so
+	only the blocks of points are sent with each task; with 'threads'
+	each task refers to the caller's models directly.
+
+	Returns
+	-------
+	list of ndarray
+		The scaled densities from each model.
+	"""
+	import os
+	import functools
+	from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+	if backend not in ('processes', 'threads'):
+		raise ValueError(f"backend must be 'processes' or 'threads', not {backend!r}")
+	if n_jobs == -1:
+		n_jobs = os.cpu_count()
+	starts = range(0, len(latlon_radians), max(int(chunk_size), 1))
+	if backend == 'processes':
+		# the worker processes, and the models they hold, end with the pool
+		pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_kde_worker, initargs=(models,))
+		score = _score_block
+	else:
+		pool = ThreadPoolExecutor(max_workers=n_jobs)
+		score = functools.partial(_score_block, models=models)
+	with pool as executor:
+		futures = [
+			[executor.submit(score, i, latlon_radians[j:j + chunk_size]) for j in starts]
+			for i in range(len(models))
+		]
+		return [
+			np.concatenate([f.result() for f in blocks]) if blocks else np.empty(0)
+			for blocks in futures
+		]
+
 
 class GeoKernelDensities(dict):
 
@@ -164,18 +831,59 @@ class GeoKernelDensities(dict):
 	def crs(self):
 		return next(iter(self.values())).crs
 
-	def __call__(self, target_points, copy=True):
+	def __call__(self, target_points, copy=True, engine='exact', check=200, n_jobs=None, chunk_size=10_000, backend='processes'):
+		"""
+		Evaluate the density of every category at target points.
+
+		Parameters
+		----------
+		target_points : GeoDataFrame
+		copy : bool, default True
+			Write to a copy of `target_points`.
+		engine : {'exact', 'fft'}, default 'exact'
+		check : int, default 200
+			See `GeoKernelDensity.__call__`.
+		n_jobs : int, optional
+			Spread the exact evaluation across this many workers.  Set
+			to -1 to use all CPUs.  By default all work is done in this
+			process.
+		chunk_size : int, default 10_000
+			With `n_jobs`, the number of target points in each task.
+		backend : {'processes', 'threads'}, default 'processes'
+			With `n_jobs`, the kind of worker pool.  Each worker is given
+			the fitted models once when it starts.
+		"""
 		if copy:
 			target_points = target_points.copy()
-		target = target_points.to_crs(epsg=4326)
-		latlon_radians = np.radians(np.vstack([
-			target.geometry.y.values,
-			target.geometry.x.values,
-		]).T)
-		for k in self.keys():
-			target_points[k] = np.exp(self[k].score_samples(latlon_radians)) * self[k].total_sample_weight
+		named = list(self.items())
 		if hasattr(self, 'agg'):
-			target_points['agg'] = np.exp(self.agg.score_samples(latlon_radians)) * self.agg.total_sample_weight
+			named.append(('agg', self.agg))
+		if engine != 'exact':
+			for k, model in named:
+				model(target_points, name=k, copy=False, engine=engine, check=check)
+			return target_points
+
+		todo = []
+		for k, model in named:
+			key = _density_key(model, target_points, engine)
+			hit = _density_get(key)
+			if hit is None:
+				todo.append((k, model, key))
+			else:
+				target_points[k] = hit[0].ravel()
+		if not todo:
+			return target_points
+
+		latlon_radians = todo[0][1]._target_coordinates(target_points)
+		models = [model for _, model, _ in todo]
+		if n_jobs is not None and n_jobs != 1:
+			zs = _score_blocks(models, latlon_radians, n_jobs, chunk_size, backend)
+		else:
+			zs = [np.exp(m.score_samples(latlon_radians)) * m.total_sample_weight for m in models]
+		for (k, model, key), z in zip(todo, zs):
+			target_points[k] = z
+			if key is not None:
+				_density_put(key, z.reshape(target_points.gridshape))
 		return target_points
 
 	def meshgrid(
@@ -187,6 +895,11 @@ class GeoKernelDensities(dict):
 			mesh=None,
 			total=None,
 			add_prior=0,
+			engine='exact',
+			n_jobs=None,
+			chunk_size=10_000,
+			backend='processes',
+			lightweight=False,
 	):
 
 		if mesh is None:
@@ -206,14 +919,15 @@ class GeoKernelDensities(dict):
 					else:
 						bounds = self.agg.points.to_crs(crs)
 
-			mesh = GeoMeshGrid(bounds=bounds, resolution=resolution, crs=crs)
+			grid = ArrayMeshGrid if lightweight else GeoMeshGrid
+			mesh = grid(bounds=bounds, resolution=resolution, crs=crs)
 
-		mesh = self(mesh, copy=False)
+		mesh = self(mesh, copy=False, engine=engine, n_jobs=n_jobs, chunk_size=chunk_size, backend=backend)
 
 		if add_prior:
 			mesh = self.add_prior(mesh, prior=add_prior, total=total)
 		elif total:
-			mesh[total] = mesh[list(self.keys())].sum(axis=1)
+			mesh[total] = sum(mesh[k] for k in self.keys())
 
 		return mesh
 
@@ -221,15 +935,169 @@ class GeoKernelDensities(dict):
 		if not inplace:
 			mesh = mesh.copy()
 		gross_sample_weight = sum(self[k].total_sample_weight for k in self.keys())
-		orig_total = mesh[list(self.keys())].values.sum()
+		orig_total = sum(np.asarray(mesh[k]).sum() for k in self.keys())
 		prior *= orig_total / gross_sample_weight
 		for k in self.keys():
-			mesh[k] += prior * self[k].total_sample_weight / gross_sample_weight
+			mesh[k] = mesh[k] + prior * self[k].total_sample_weight / gross_sample_weight
 		if total:
-			mesh[total] = mesh[list(self.keys())].sum(axis=1)
+			mesh[total] = sum(mesh[k] for k in self.keys())
 		if not inplace:
 			return mesh
 
+def _near_true_scale(X, tolerance=0.01):
+	"""
+	Whether the projected crs of X measures ground distance in metres
+	to within `tolerance` across the extent of X.
+
+	The scale factors are checked at the corners and middle of the
+	extent of X.  This rules out web mercator, whose scale grows as
+	1/cos(latitude), and other projections not meant for measurement.
+	"""
+	from pyproj import Proj
+	if X.crs.axis_info[0].unit_name not in ('metre', 'meter'):
+		return False
+	x0, y0, x1, y1 = X.to_crs(epsg=4326).total_bounds
+	lon = np.array([x0, x0, x1, x1, (x0 + x1) / 2])
+	lat = np.array([y0, y1, y0, y1, (y0 + y1) / 2])
+	factors = Proj(X.crs).get_factors(lon, lat)
+	scales = np.concatenate([
+		np.asarray(factors.meridional_scale),
+		np.asarray(factors.parallel_scale),
+	])
+	return bool(np.all(np.isfinite(scales)) and np.all(np.abs(scales - 1) <= tolerance))
+
+
+class _CategoryKernel:
+	"""
+	One category of a `SharedGeoKernelDensities`.
+
+	This stands in for a separately fitted model, giving the attributes
+	that `GeoKernelDensities` uses, but has no tree of its own.
+	"""
+
+	def __init__(self, model, points, total_sample_weight):
+		self.model = model
+		self.points = points
+		self.total_sample_weight = total_sample_weight
+
+	@property
+	def bandwidth(self):
+		return self.model.bandwidth
+
+	@property
+	def kernel(self):
+		return self.model.kernel
+
+	@property
+	def crs(self):
+		return self.model.crs
+
+
+class SharedGeoKernelDensities(GeoKernelDensities):
+	"""
+	Kernel densities for several categories of points, from one tree.
+
+	This is created by `GeoKernelDensity.multifit` with `shared_tree=True`.
+	A single spatial tree is built over all the points, and each target
+	point's neighbors within the kernel's support are found once; the
+	density of every category (and of all points together) is then a
+	sum of the kernel values over that category's neighbors.  Run time
+	grows with the number of points, not the number of categories times
+	the number of points.
+
+	All categories share the bandwidth of the model, which if
+	automatic is chosen from all the points.  Kernels with unbounded
+	support (gaussian, exponential) are truncated where they fall below
+	about 1e-5 of their peak.
+	"""
+
+	def __init__(self, model, codes, categories, agg=False):
+		super().__init__()
+		self.model = model
+		self.codes = np.asarray(codes)
+		self.categories = list(categories)
+		points = model.points
+		for i, c in enumerate(self.categories):
+			mask = self.codes == i
+			self[c] = _CategoryKernel(model, points[mask], int(mask.sum()))
+		if agg:
+			self.agg = _CategoryKernel(model, points, len(self.codes))
+
+	def density_matrix(self, target_points, chunk_size=10_000):
+		"""
+		Evaluate the density of every category at target points.
+
+		Parameters
+		----------
+		target_points : GeoDataFrame or mesh grid
+		chunk_size : int, default 10_000
+			The number of target points to query at once, which bounds
+			the memory used for neighbor lists.
+
+		Returns
+		-------
+		ndarray
+			Shape (n_targets, n_categories + 1) array of densities,
+			each scaled by its category's total sample weight as for
+			`GeoKernelDensities`, with the aggregate in the last column.
+		"""
+		model = self.model
+		key = _density_key(model, target_points, 'shared:' + self._codes_digest())
+		hit = _density_get(key)
+		if hit is not None:
+			return hit[0]
+
+		coords = model._target_coordinates(target_points)
+		n_categories = len(self.categories)
+		support = model.bandwidth * _KERNEL_SUPPORT.get(model.kernel, 1.0)
+		unit = KernelDensity(kernel=model.kernel, bandwidth=model.bandwidth).fit(np.zeros((1, 2)))
+		result = np.zeros((len(coords), n_categories + 1))
+		chunk_size = max(int(chunk_size), 1)
+		for start in range(0, len(coords), chunk_size):
+			block = coords[start:start + chunk_size]
+			ind, dist = model.tree_.query_radius(block, support, return_distance=True)
+			counts = np.fromiter((len(i) for i in ind), dtype=np.intp, count=len(ind))
+			if counts.sum() == 0:
+				continue
+			target = np.repeat(np.arange(len(block)), counts)
+			source = np.concatenate(ind)
+			d = np.concatenate(dist)
+			k = np.exp(unit.score_samples(np.column_stack([d, np.zeros_like(d)])))
+			sums = np.bincount(
+				target * n_categories + self.codes[source],
+				weights=k,
+				minlength=len(block) * n_categories,
+			)
+			result[start:start + len(block), :n_categories] = sums.reshape(len(block), n_categories)
+		result[:, n_categories] = result[:, :n_categories].sum(axis=1)
+		if key is not None:
+			_density_put(key, result)
+		return result
+
+	def _codes_digest(self):
+		import hashlib
+		return hashlib.sha1(np.ascontiguousarray(self.codes, dtype=np.int64).tobytes()).hexdigest()
+
+	def __call__(self, target_points, copy=True, engine='exact', check=200, n_jobs=None, chunk_size=10_000, backend='processes'):
+		"""
+		Evaluate the density of every category at target points.
+
+		Only the 'exact' engine is available, and `n_jobs`, `check` and
+		`backend` are ignored; otherwise this is the same as
+		`GeoKernelDensities.__call__`.
+		"""
+		if engine != 'exact':
+			raise ValueError("shared tree densities only support the 'exact' engine")
+		if copy:
+			target_points = target_points.copy()
+		z = self.density_matrix(target_points, chunk_size=chunk_size)
+		for i, c in enumerate(self.categories):
+			target_points[c] = z[:, i]
+		if hasattr(self, 'agg'):
+			target_points['agg'] = z[:, -1]
+		return target_points
+
+
 class GeoKernelDensity(KernelDensity):
 
 	def __init__(
@@ -243,6 +1111,7 @@ class GeoKernelDensity(KernelDensity):
 			breadth_first=True,
 			leaf_size=40,
 			metric_params=None,
+			plane_crs=None,
 	):
 		bw = bandwidth
 		if bandwidth is None:
@@ -255,64 +1124,232 @@ class GeoKernelDensity(KernelDensity):
 			metric_params=metric_params
 		)
 		self.bandwidth = bw
+		self.plane_crs = plane_crs
+
+	def _resolve_plane_crs(self, X):
+		"""
+		Get the projected crs to fit in, or None for great circle distances.
+		"""
+		if self.plane_crs is None:
+			return None
+		if isinstance(self.plane_crs, str) and self.plane_crs == 'auto':
+			if X.crs is not None and X.crs.is_projected and _near_true_scale(X):
+				crs = X.crs
+			else:
+				crs = X.estimate_utm_crs()
+		else:
+			crs = CRS.from_user_input(self.plane_crs)
+		if not crs.is_projected:
+			raise ValueError(f"plane_crs must be a projected crs, not {crs.name}")
+		if crs.axis_info[0].unit_name not in ('metre', 'meter'):
+			raise ValueError(f"plane_crs must have units of metres, not {crs.axis_info[0].unit_name}")
+		return crs
+
+	def _effective_metric(self):
+		"""
+		The metric and tree algorithm to fit with.
+
+		Distances in a `plane_crs` are euclidean, so the default
+		haversine metric is replaced, and a kd tree used, whenever the
+		model is fit in a plane.  This is decided at fit time, so that
+		`set_params(plane_crs=...)` works like the constructor does.
+		"""
+		metric, algorithm = self.metric, self.algorithm
+		if self.plane_crs is not None and metric == "haversine":
+			metric = "euclidean"
+			if algorithm == 'auto':
+				algorithm = 'kd_tree'
+		return metric, algorithm
+
+	def _fit_tree(self, coords, sample_weight=None):
+		# fit with the effective metric, leaving the parameters as given
+		params = self.metric, self.algorithm
+		self.metric, self.algorithm = self.effective_metric_, self._effective_metric()[1]
+		try:
+			super().fit(coords, sample_weight=sample_weight)
+		finally:
+			self.metric, self.algorithm = params
+
+	def _target_coordinates(self, target, index=None):
+		"""
+		Coordinates of target points or a mesh grid, for evaluating the model.
+		"""
+		fit_crs = getattr(self, 'fit_crs', None)
+		if fit_crs is None:
+			return _target_latlon_radians(target, index)
+		return _target_xy(target, fit_crs, index)
 
 	def fit(self, X, y=None, sample_weight=None):
+		"""
+		Fit the kernel density model on points.
+
+		By default distances are great circle distances, and the
+		bandwidth is in radians.  If the model has a `plane_crs`, the
+		points are instead projected to it ('auto' uses the crs of `X`
+		if it is projected and its scale is within 1% of true ground
+		distance everywhere across the points, or else a local UTM
+		zone, so web mercator and similar map projections are never
+		used as the plane), distances are
+		euclidean in that plane, and the bandwidth is in metres.  This
+		is accurate enough for city and regional scale maps and much
+		faster, and densities are per square metre.
+
+		Parameters
+		----------
+		X : GeoDataFrame or GeoSeries
+		y : ignored
+		sample_weight : array-like, optional
+		"""
 		# instantiate and fit the KDE model
 
 		if not isinstance(X, (gpd.GeoDataFrame, gpd.GeoSeries)):
 			raise TypeError('GeoKernelDensity must be fit on GeoDataFrame or GeoSeries')
 
 		self.crs = X.crs
-		self.points = X.to_crs(epsg=4326)
-
-		latlon = np.vstack([
-			self.points.geometry.y.values,
-			self.points.geometry.x.values,
-		]).T
-
-		self.latlon_radians = latlon_radians = np.radians(latlon)
+		self.fit_crs = self._resolve_plane_crs(X)
+		self.effective_metric_ = self._effective_metric()[0]
+		self._fingerprint = None
+
+		if self.fit_crs is None:
+			self.points = X.to_crs(epsg=4326)
+			latlon = np.vstack([
+				self.points.geometry.y.values,
+				self.points.geometry.x.values,
+			]).T
+			self.latlon_radians = coords = np.radians(latlon)
+		else:
+			self.points = X if X.crs.equals(self.fit_crs) else X.to_crs(self.fit_crs)
+			coords = np.column_stack([
+				self.points.geometry.x.values,
+				self.points.geometry.y.values,
+			])
 
 		if self.bandwidth is None:
-			self.bandwidth = (len(self.points)**(-1/6) * latlon_radians.std(0).mean())
+			self.bandwidth = (len(self.points)**(-1/6) * coords.std(0).mean())
 
 		if sample_weight is not None and sample_weight.min() <= 0:
 			if sample_weight.max() <= 0:
 				raise ValueError("sample_weight must have some positive values")
-			use_sample_weight = sample_weight[sample_weight>0]
-			super().fit(latlon_radians[sample_weight>0,:], sample_weight=use_sample_weight)
+			use_sample_weight = np.asarray(sample_weight[sample_weight>0])
+			fit_coords = coords[np.asarray(sample_weight>0),:]
+			self.fit_sample_weight = use_sample_weight
+			self._fit_tree(fit_coords, sample_weight=use_sample_weight)
 			self.total_sample_weight = use_sample_weight.sum()
 		else:
-			super().fit(latlon_radians, sample_weight=sample_weight)
+			fit_coords = coords
+			self._fit_tree(coords, sample_weight=sample_weight)
+			self.fit_sample_weight = None if sample_weight is None else np.asarray(sample_weight)
 			if sample_weight is not None:
 				self.total_sample_weight = sample_weight.sum()
 			else:
-				self.total_sample_weight = latlon_radians.shape[0]
+				self.total_sample_weight = coords.shape[0]
+		if self.fit_crs is None:
+			self.fit_latlon_radians = fit_coords
+		else:
+			self.fit_xy = fit_coords
 		return self
 
-	def multifit(self, X, column, agg=False):
+	def multifit(self, X, column, agg=False, shared_tree=False):
+		"""
+		Fit a kernel density model for each category of points.
+
+		Parameters
+		----------
+		X : GeoDataFrame
+		column : str
+			The column of `X` giving the category of each point.
+		agg : bool, default False
+			Also fit a model on all the points together, as `agg`.
+		shared_tree : bool, default False
+			Build one spatial tree over all the points instead of fitting
+			a separate model for each category, and evaluate every
+			category from the same neighbor queries.  This is much faster
+			with many categories; all categories then share one
+			bandwidth.  See `SharedGeoKernelDensities`.
+
+		Returns
+		-------
+		GeoKernelDensities or SharedGeoKernelDensities
+		"""
 
 		if not isinstance(X, (gpd.GeoDataFrame, )):
 			raise TypeError('GeoKernelDensity must be multifit on GeoDataFrame')
 
+		if shared_tree:
+			category = pd.Categorical(X[column])
+			keep = np.asarray(category.codes >= 0)
+			model = clone(self).fit(X[keep])
+			used = np.unique(category.codes[keep])
+			codes = np.searchsorted(used, category.codes[keep])
+			return SharedGeoKernelDensities(model, codes, category.categories[used], agg=agg)
+
+		# every category must be fit in the same plane
+		base = clone(self)
+		if self.plane_crs is not None:
+			base.set_params(plane_crs=self._resolve_plane_crs(X))
+
 		kernels = GeoKernelDensities()
 		for c, cdata in X.groupby(column):
-			kernels[c] = clone(self).fit(cdata)
+			kernels[c] = clone(base).fit(cdata)
 
 		if agg:
-			kernels.agg = clone(self).fit(X)
+			kernels.agg = clone(base).fit(X)
 
 		return kernels
 
-	def __call__(self, target_points, name="Z", copy=True):
+	def __call__(self, target_points, name="Z", copy=True, engine='exact', check=200):
+		"""
+		Evaluate the density at target points.
+
+		Parameters
+		----------
+		target_points : GeoDataFrame
+		name : str, default "Z"
+			The column to write the densities to.
+		copy : bool, default True
+			Write to a copy of `target_points`.
+		engine : {'exact', 'fft'}, default 'exact'
+			'exact' evaluates the kernel density at every point.  'fft'
+			requires a GeoMeshGrid, and approximates the density by
+			binning the sample points onto the mesh lattice and
+			convolving them with the kernel by FFT, which is much
+			faster for large meshes and samples.
+		check : int, default 200
+			For the 'fft' engine, the number of mesh points at which to
+			also evaluate the exact density.  The errors found are
+			stored in `target_points.attrs['kde_error'][name]`, and a
+			warning is issued if the largest relative error is above
+			`FFT_WARN_REL_ERROR` (5%).  Set to 0 to skip this check.
+		"""
 		if copy:
 			target_points = target_points.copy()
-		target = target_points.to_crs(epsg=4326)
-		latlon = np.vstack([
-			target.geometry.y.values,
-			target.geometry.x.values,
-		]).T
-		z = np.exp(self.score_samples(np.radians(latlon)))
-		target_points[name] = z * self.total_sample_weight
+		if engine not in ('exact', 'fft'):
+			raise ValueError(f"engine must be 'exact' or 'fft', not {engine!r}")
+		if engine == 'fft' and getattr(target_points, 'gridshape', None) is None:
+			raise TypeError("the 'fft' engine can only evaluate a GeoMeshGrid")
+
+		# densities on a mesh grid are cached, see `set_density_cache`
+		key = _density_key(self, target_points, engine)
+		hit = _density_get(key)
+		if hit is not None:
+			z, error = hit
+			target_points[name] = z.ravel()
+			if error is not None and check:
+				target_points.attrs.setdefault('kde_error', {})[name] = error
+			return target_points
+
+		error = None
+		if engine == 'fft':
+			z = _fft_density(self, target_points)
+			if check:
+				error = _check_fft(self, target_points, z, check)
+				target_points.attrs.setdefault('kde_error', {})[name] = error
+				_warn_fft_error(error)
+		else:
+			z = np.exp(self.score_samples(self._target_coordinates(target_points))) * self.total_sample_weight
+		target_points[name] = z.ravel()
+		if key is not None:
+			_density_put(key, z.reshape(target_points.gridshape), error)
 		return target_points
 
 	def meshgrid(
@@ -323,7 +1360,18 @@ class GeoKernelDensity(KernelDensity):
 			crs=None,
 			mesh=None,
 			name="Z",
+			engine='exact',
+			lightweight=False,
 	):
+		"""
+		Evaluate the density on a mesh grid.
+
+		If no `mesh` is given, one is created from `bounds` (or the
+		limits of `ax`, or the fitted points) and `resolution`.  Set
+		`lightweight` to create an `ArrayMeshGrid` rather than a
+		`GeoMeshGrid`, which avoids creating a point geometry for
+		every grid cell.
+		"""
 
 		if mesh is None:
 			if bounds is None and ax is not None:
@@ -341,9 +1389,10 @@ class GeoKernelDensity(KernelDensity):
 				else:
 					bounds = self.points.to_crs(crs)
 
-			mesh = GeoMeshGrid(bounds=bounds, resolution=resolution, crs=crs)
+			grid = ArrayMeshGrid if lightweight else GeoMeshGrid
+			mesh = grid(bounds=bounds, resolution=resolution, crs=crs)
 
-		mesh = self(mesh, name=name, copy=False)
+		mesh = self(mesh, name=name, copy=False, engine=engine)
 
 		return mesh
 
@@ -362,6 +1411,8 @@ class GeoKernelDensity(KernelDensity):
 			mesh=None,
 			mask=None,
 			name="Z",
+			engine='exact',
+			lightweight=False,
 			**kwargs,
 	):
 
@@ -375,6 +1426,8 @@ class GeoKernelDensity(KernelDensity):
 			crs=crs,
 			mesh=mesh,
 			name=name,
+			engine=engine,
+			lightweight=lightweight,
 		)
 
 		return mesh.contour(
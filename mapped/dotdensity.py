@@ -1,15 +1,58 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
 import geopandas as gpd
+import shapely
 import shapely.geometry
+import shapely.wkb
 from shapely.geometry import Point
-from numpy.random import RandomState, uniform
+
+try:
+	from shapely import contains_xy as _contains_xy, prepare as _prepare
+except ImportError:  # shapely < 2
+	from shapely.vectorized import contains as _contains_xy
+	from shapely.prepared import prep as _prep
+	_prepare = None
+
+try:
+	from shapely import constrained_delaunay_triangles as _constrained_delaunay_triangles
+except ImportError:  # shapely < 2.1
+	_constrained_delaunay_triangles = None
+
+MAX_BATCH_SIZE = 1_000_000
+
+ENGINES = ('rejection', 'triangulation')
+
+
+def _rng(seed):
+	"""
+	Get a numpy random Generator from a seed or an existing Generator.
+	"""
+	if isinstance(seed, np.random.Generator):
+		return seed
+	return np.random.default_rng(seed)
 
 
-def _gridded_polygon(poly, n, crs=None):
+def _prepared(poly):
+	"""
+	Prepare a polygon for repeated point-in-polygon tests.
+	"""
+	if _prepare is None:
+		return _prep(poly)
+	_prepare(poly)
+	return poly
+
+
+def _gridded_polygon(poly, n):
 	"""
 	Slice a polygon with a grid.
 
+	The grid cells are built and intersected with the polygon as
+	arrays, skipping cells that do not touch the polygon at all.
+
 	Parameters
 	----------
 	poly : Polygon
@@ -18,47 +61,301 @@ def _gridded_polygon(poly, n, crs=None):
 
 	Returns
 	-------
-	chopped : GeoDataFrame
+	pieces : ndarray of geometries
+		The non-empty parts of the polygon in each grid cell.
+	areas : ndarray
+		The area of each piece.
 	"""
-
 	if isinstance(n, int):
 		n = (n,n)
 
-	poly_df = gpd.GeoDataFrame(geometry=[poly], crs=crs)
-
 	minx, miny, maxx, maxy = poly.bounds
-
 	x_ = np.linspace(minx, maxx, n[0]+1)
 	y_ = np.linspace(miny, maxy, n[1]+1)
+	x1, y1 = np.meshgrid(x_[:-1], y_[:-1])
+	x2, y2 = np.meshgrid(x_[1:], y_[1:])
+
+	if _prepare is None:  # shapely < 2
+		pieces = [
+			poly.intersection(shapely.geometry.box(*b))
+			for b in zip(x1.ravel(), y1.ravel(), x2.ravel(), y2.ravel())
+		]
+		pieces = np.array([p for p in pieces if not p.is_empty], dtype=object)
+		areas = np.array([p.area for p in pieces], dtype=float)
+	else:
+		cells = shapely.box(x1.ravel(), y1.ravel(), x2.ravel(), y2.ravel())
+		_prepare(poly)
+		cells = cells[shapely.intersects(poly, cells)]
+		pieces = shapely.intersection(poly, cells)
+		areas = shapely.area(pieces)
+	keep = areas > 0
+	return pieces[keep], areas[keep]
+
+
+def _quotas(weights, num_points):
+	"""
+	Split a number of points in proportion to weights, summing exactly.
+
+	Uses largest remainder rounding.
+	"""
+	weights = np.asarray(weights, dtype=float)
+	share = weights / weights.sum() * num_points
+	quant = np.floor(share).astype(int)
+	short = int(num_points - quant.sum())
+	if short > 0:
+		quant[np.argsort(quant - share, kind='stable')[:short]] += 1
+	return quant
+
+
+def _generate_random_points_in_gridded_polygons(pieces, areas, num_points, seed=None):
+	"""
+	Create random point coordinates in the pieces of a gridded polygon.
+
+	The points are returned in random order, not grouped by piece, so
+	that any run of them is spread over the whole polygon.
+	"""
+	rng = _rng(seed)
+	if len(pieces) == 0:
+		return np.empty((0, 2))
+	xy = [
+		_random_xy_in_polygon(poly, q, rng)
+		for (poly, q) in zip(pieces, _quotas(areas, num_points))
+		if q > 0
+	]
+	if not xy:
+		return np.empty((0, 2))
+	xy = np.concatenate(xy)
+	return xy[rng.permutation(len(xy))]
+
+
+def _generate_random_points_in_polygon_grid(poly, num_points, n, seed=None):
+	pieces, areas = _gridded_polygon(poly, n)
+	return _generate_random_points_in_gridded_polygons(pieces, areas, num_points, seed=seed)
+
+
+def _is_sparse(poly):
+	"""
+	Whether a polygon fills too little of its bounding box to sample directly.
+	"""
+	min_x, min_y, max_x, max_y = poly.bounds
+	return poly.area < (max_x - min_x) * (max_y - min_y) * 0.25
+
+
+def _random_xy_in_polygon(poly, num_points, seed=None):
+	"""
+	Create an array of random point coordinates within a polygon.
+
+	Candidate points are drawn uniformly over the bounding box in
+	vectorized batches, sized from the ratio of the polygon's area to
+	its bounding box area, and tested against the prepared polygon
+	all at once.  Batches are drawn until the quota is met.
+
+	Parameters
+	----------
+	poly : Polygon
+	num_points : int
+	seed : int or numpy.random.Generator, optional
+
+	Returns
+	-------
+	ndarray
+		Shape (num_points, 2) array of x, y coordinates.
+	"""
+	num_points = int(num_points)
+	if num_points <= 0 or poly.is_empty:
+		return np.empty((0, 2))
+	rng = _rng(seed)
+
+	min_x, min_y, max_x, max_y = poly.bounds
+	bbox_area = (max_x - min_x) * (max_y - min_y)
+	if _is_sparse(poly) and num_points > 5:
+		return _generate_random_points_in_polygon_grid(poly, num_points, 4, seed=rng)
+
+	fill_ratio = poly.area / bbox_area if bbox_area > 0 else 1.0
+	prepared = _prepared(poly)
+	found = []
+	n_found = 0
+	while n_found < num_points:
+		remaining = num_points - n_found
+		batch = int(min(np.ceil(remaining / max(fill_ratio, 1e-6) * 1.1) + 16, MAX_BATCH_SIZE))
+		x = rng.uniform(min_x, max_x, batch)
+		y = rng.uniform(min_y, max_y, batch)
+		inside = _contains_xy(prepared, x, y)
+		xy = np.column_stack([x[inside], y[inside]])[:remaining]
+		found.append(xy)
+		n_found += len(xy)
+	return np.concatenate(found)
+
+
+def _triangulate(poly):
+	"""
+	Split a polygon into triangles.
+
+	Parameters
+	----------
+	poly : Polygon or MultiPolygon
+
+	Returns
+	-------
+	ndarray
+		Shape (n, 3, 2) array of triangle vertex coordinates.
+	"""
+	if _constrained_delaunay_triangles is None:
+		raise ImportError("the triangulation engine requires shapely >= 2.1")
+	triangles = shapely.get_parts(_constrained_delaunay_triangles(poly))
+	if len(triangles) == 0:
+		return np.empty((0, 3, 2))
+	return shapely.get_coordinates(triangles).reshape(-1, 4, 2)[:, :3, :]
+
+
+def _random_xy_in_triangles(triangles, num_points, seed=None):
+	"""
+	Create an array of random point coordinates within a set of triangles.
+
+	Triangles are chosen in proportion to their area, and points are
+	placed within each chosen triangle by uniform barycentric sampling,
+	so no candidate points are ever rejected.
+
+	Parameters
+	----------
+	triangles : ndarray
+		Shape (n, 3, 2) array of triangle vertex coordinates, as
+		returned by `_triangulate`.
+	num_points : int
+	seed : int or numpy.random.Generator, optional
+
+	Returns
+	-------
+	ndarray
+		Shape (num_points, 2) array of x, y coordinates.
+	"""
+	num_points = int(num_points)
+	if num_points <= 0 or len(triangles) == 0:
+		return np.empty((0, 2))
+	rng = _rng(seed)
+	a = triangles[:, 0, :]
+	ab = triangles[:, 1, :] - a
+	ac = triangles[:, 2, :] - a
+	area = 0.5 * np.abs(ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0])
+	cumulative = np.cumsum(area)
+	which = np.searchsorted(cumulative, rng.random(num_points) * cumulative[-1], side='right')
+	which = np.minimum(which, len(triangles) - 1)
+	r = rng.random((num_points, 2))
+	flip = r.sum(axis=1) > 1
+	r[flip] = 1 - r[flip]
+	return a[which] + r[:, :1] * ab[which] + r[:, 1:] * ac[which]
+
+
+def _open_weights(weights):
+	"""
+	Open a weight raster, if given as a path.
+
+	Returns
+	-------
+	dataset : rasterio.DatasetReader or None
+	opened : bool
+		Whether the dataset was opened here, and so should be closed
+		by the caller.
+	"""
+	if weights is None:
+		return None, False
+	if hasattr(weights, 'read') and hasattr(weights, 'transform'):
+		return weights, False
+	import rasterio
+	return rasterio.open(weights), True
+
+
+def _random_xy_weighted(poly, num_points, raster, seed=None, band=1, engine='rejection'):
+	"""
+	Create an array of random point coordinates within a polygon, by weight.
+
+	Raster cells whose centers fall within the polygon are chosen in
+	proportion to their weight, and each point is placed uniformly
+	within its chosen cell.  Only the block of the raster covering the
+	polygon is read.  Points that land in the part of a boundary cell
+	outside the polygon are redrawn, so zero-weight areas cost nothing.
+	If no cell in the polygon has any weight, points are placed
+	uniformly in the polygon instead.
 
-	boxes = []
-	for (y1, y2) in zip(y_[:-1], y_[1:]):
-		for (x1, x2) in zip(x_[:-1], x_[1:]):
-			boxes.append(shapely.geometry.box(x1, y1, x2, y2))
+	Parameters
+	----------
+	poly : Polygon
+		In the coordinate reference system of the raster.
+	num_points : int
+	raster : rasterio.DatasetReader
+	seed : int or numpy.random.Generator, optional
+	band : int, default 1
+	engine : {'rejection', 'triangulation'}, default 'rejection'
+		How to sample points in polygons that have no weight.
 
-	grid = gpd.GeoDataFrame(geometry=gpd.GeoSeries(boxes, crs=poly_df.crs))
+	Returns
+	-------
+	ndarray
+		Shape (num_points, 2) array of x, y coordinates.
+	"""
+	from rasterio.windows import Window
+	from rasterio.features import geometry_mask
 
-	chopped = gpd.overlay(poly_df, grid, how='identity')
-	return chopped
+	num_points = int(num_points)
+	if num_points <= 0 or poly.is_empty:
+		return np.empty((0, 2))
+	rng = _rng(seed)
 
+	min_x, min_y, max_x, max_y = poly.bounds
+	cols, rows = ~raster.transform * (np.array([min_x, max_x, min_x, max_x]), np.array([min_y, min_y, max_y, max_y]))
+	col0 = int(np.clip(np.floor(cols.min()), 0, raster.width))
+	col1 = int(np.clip(np.ceil(cols.max()), 0, raster.width))
+	row0 = int(np.clip(np.floor(rows.min()), 0, raster.height))
+	row1 = int(np.clip(np.ceil(rows.max()), 0, raster.height))
+	weight = None
+	if col1 > col0 and row1 > row0:
+		window = Window(col0, row0, col1 - col0, row1 - row0)
+		transform = raster.window_transform(window)
+		weight = raster.read(band, window=window, masked=True).astype(float).filled(0)
+		weight[geometry_mask([poly], weight.shape, transform)] = 0
+		weight[~np.isfinite(weight) | (weight < 0)] = 0
+	if weight is None or weight.sum() <= 0:
+		return _random_xy(poly, num_points, seed=rng, engine=engine)
 
-def _generate_random_points_in_gridded_polygons(polys, num_points, seed=None):
-	quant = (polys.area.cumsum() / polys.area.sum()) * num_points
-	quant = quant.astype(int)
-	quant.values[1:] = quant.values[1:] - quant.values[:-1]
-	points = []
-	for (poly, q) in zip(polys.geometry, quant):
-		points.extend(generate_random_points_in_polygon(poly, q, seed=seed))
-	return points
+	cells = np.flatnonzero(weight)
+	cumulative = np.cumsum(weight.ravel()[cells])
+	prepared = _prepared(poly)
+	found = []
+	n_found = 0
+	for _ in range(20):
+		remaining = num_points - n_found
+		which = cells[np.minimum(
+			np.searchsorted(cumulative, rng.random(remaining) * cumulative[-1], side='right'),
+			len(cells) - 1,
+		)]
+		row, col = np.divmod(which, weight.shape[1])
+		x, y = transform * (col + rng.random(remaining), row + rng.random(remaining))
+		inside = _contains_xy(prepared, x, y)
+		found.append(np.column_stack([x[inside], y[inside]]))
+		n_found += int(inside.sum())
+		if n_found >= num_points:
+			break
+	else:
+		# cell centers are within the polygon, so fall back to them
+		row, col = np.divmod(which[~inside], weight.shape[1])
+		x, y = transform * (col + 0.5, row + 0.5)
+		found.append(np.column_stack([x, y]))
+	# redrawn points come from boundary cells, so mix them in
+	xy = np.concatenate(found)[:num_points]
+	return xy[rng.permutation(len(xy))]
 
 
-def _generate_random_points_in_polygon_grid(poly, num_points, n, seed=None, crs=None):
-	g = _gridded_polygon(poly, n, crs=crs)
-	points = _generate_random_points_in_gridded_polygons(g, num_points, seed=seed)
-	return points
+def _random_xy(poly, num_points, seed=None, engine='rejection'):
+	if engine == 'rejection':
+		return _random_xy_in_polygon(poly, num_points, seed=seed)
+	elif engine == 'triangulation':
+		if int(num_points) <= 0 or poly.is_empty:
+			return np.empty((0, 2))
+		return _random_xy_in_triangles(_triangulate(poly), num_points, seed=seed)
+	raise ValueError(f"engine must be one of {ENGINES}, not {engine!r}")
 
 
-def generate_random_points_in_polygon(poly, num_points, seed=None):
+def generate_random_points_in_polygon(poly, num_points, seed=None, engine='rejection', weights=None, band=1):
 	"""
 	Create a list of randomly generated points within a polygon.
 
@@ -67,32 +364,187 @@ def generate_random_points_in_polygon(poly, num_points, seed=None):
 	poly : Polygon
 	num_points : int
 		The number of random points to create within the polygon
-	seed : int, optional
-		A random seed
+	seed : int or numpy.random.Generator, optional
+		A random seed.  Results are reproducible for a given seed.
+	engine : {'rejection', 'triangulation'}, default 'rejection'
+		How to sample points.  'rejection' draws points in the bounding
+		box and keeps those inside the polygon.  'triangulation' splits
+		the polygon into triangles once and samples them directly, which
+		is much faster for long thin or very sparse polygons (requires
+		shapely >= 2.1).
+	weights : str or rasterio.DatasetReader, optional
+		A raster of weights, such as land cover or building density, in
+		the same coordinate reference system as `poly`.  If given, points
+		are placed in raster cells in proportion to their weight instead
+		of uniformly (requires rasterio).
+	band : int, default 1
+		The band of `weights` to use.
 
 	Returns
 	-------
 	List
 	"""
-	min_x, min_y, max_x, max_y = poly.bounds
+	if weights is None:
+		xy = _random_xy(poly, num_points, seed=seed, engine=engine)
+	else:
+		raster, opened = _open_weights(weights)
+		try:
+			xy = _random_xy_weighted(poly, num_points, raster, seed=seed, band=band, engine=engine)
+		finally:
+			if opened:
+				raster.close()
+	return [Point(x, y) for x, y in xy]
+
+
+def _polygon_rng(entropy, position):
+	"""
+	Get the random number generator for one polygon.
+
+	Each polygon gets an independent stream, spawned from the same
+	root entropy and keyed on the polygon's position, so the result
+	does not depend on how the polygons are divided among workers.
+	"""
+	return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(int(position),)))
 
-	if poly.area < (max_x-min_x) * (max_y-min_y) * 0.25 and num_points > 5:
-		return _generate_random_points_in_polygon_grid(poly, num_points, 4, seed=seed)
 
-	points = []
-	i = 0
-	while len(points) < num_points:
-		s = RandomState(seed + i) if seed else RandomState(seed)
-		while True:
-			random_point = Point([s.uniform(min_x, max_x), s.uniform(min_y, max_y)])
-			if random_point.within(poly):
-				break
-		points.append(random_point)
-		i += 1
-	return points
+def _sample_shard(geoms, counts, positions, entropy, engine, wkb=False, weights=None, band=1):
+	"""
+	Sample points for a shard of polygons.
+
+	This runs in worker processes, so the polygons may be given as WKB,
+	and the weight raster as a path to open.
+	"""
+	if wkb:
+		geoms = [shapely.wkb.loads(g) for g in geoms]
+	if weights is None:
+		return [
+			_random_xy(geom, n, seed=_polygon_rng(entropy, i), engine=engine)
+			for geom, n, i in zip(geoms, counts, positions)
+		]
+	raster, opened = _open_weights(weights)
+	try:
+		return [
+			_random_xy_weighted(geom, n, raster, seed=_polygon_rng(entropy, i), band=band, engine=engine)
+			for geom, n, i in zip(geoms, counts, positions)
+		]
+	finally:
+		if opened:
+			raster.close()
+
+
+def _shards(counts, n_shards):
+	"""
+	Split polygon positions into contiguous shards with similar point counts.
+	"""
+	cumulative = np.cumsum(counts)
+	if len(cumulative) == 0 or cumulative[-1] == 0:
+		return [np.arange(len(counts))]
+	cuts = np.searchsorted(cumulative, np.linspace(0, cumulative[-1], n_shards + 1)[1:-1], side='right')
+	return [s for s in np.split(np.arange(len(counts)), np.unique(cuts)) if len(s)]
+
+
+def _sample_areas(geoms, counts, seed=None, engine='rejection', n_jobs=None, executor=None, weights=None, band=1):
+	"""
+	Sample points for many polygons, optionally across a process pool.
+
+	Returns
+	-------
+	list of ndarray
+		One (n, 2) array of coordinates per polygon.
+	"""
+	geoms = list(geoms)
+	counts = np.asarray(counts, dtype=int)
+	entropy = np.random.SeedSequence(seed).entropy
+	if n_jobs == -1:
+		n_jobs = os.cpu_count()
+	if executor is None and (n_jobs is None or n_jobs <= 1):
+		return _sample_shard(geoms, counts, range(len(geoms)), entropy, engine, weights=weights, band=band)
+
+	own_executor = executor is None
+	if own_executor:
+		executor = ProcessPoolExecutor(max_workers=n_jobs)
+	try:
+		n_workers = getattr(executor, '_max_workers', None) or n_jobs or os.cpu_count()
+		futures = []
+		for shard in _shards(counts, n_workers * 4):
+			futures.append(executor.submit(
+				_sample_shard,
+				[geoms[i].wkb for i in shard],
+				counts[shard],
+				shard,
+				entropy,
+				engine,
+				True,
+				weights,
+				band,
+			))
+		xy = []
+		for future in futures:
+			xy.extend(future.result())
+	finally:
+		if own_executor:
+			executor.shutdown()
+	return xy
+
+
+def _concat_xy(xy):
+	"""
+	Combine per-polygon coordinate arrays.
+
+	Returns
+	-------
+	coords : ndarray
+		Shape (n, 2) array of all coordinates.
+	positions : ndarray
+		The position of the source polygon of each point.
+	"""
+	lengths = np.fromiter((len(p) for p in xy), dtype=np.intp, count=len(xy))
+	positions = np.repeat(np.arange(len(xy)), lengths)
+	if lengths.sum() == 0:
+		return np.empty((0, 2)), positions
+	return np.concatenate([p for p in xy if len(p)]), positions
+
+
+def _point_counts(gdf, values, units_per_point=1):
+	"""
+	Get the number of points to create in each area for each category.
+
+	Returns
+	-------
+	counts : ndarray
+		Shape (n_areas, n_categories) array of integer counts.
+	categories : list or None
+		The category labels, or None if `values` is a single column.
+	"""
+	if isinstance(values, pd.DataFrame):
+		categories = list(values.columns)
+		values = [values[c] for c in categories]
+	elif isinstance(values, (list, tuple)):
+		categories = [_category_name(v) for v in values]
+		if len(set(categories)) < len(categories) or None in categories:
+			categories = list(range(len(values)))
+	else:
+		categories = None
+		values = [values]
+	columns = []
+	for v in values:
+		if isinstance(v, str) and v in gdf.columns:
+			v = gdf[v]
+		columns.append(np.asarray(v / units_per_point).astype(int))
+	return np.column_stack(columns), categories
+
+
+def _shuffle_rng(entropy):
+	"""
+	Get the random number generator for shuffling the order of points.
+
+	This is kept apart from the per-polygon streams so shuffling does
+	not change where points are placed.
+	"""
+	return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(0, 1)))
 
 
-def generate_points_in_areas(gdf, values, units_per_point=1, seed=None):
+def generate_points_in_areas(gdf, values, units_per_point=1, seed=None, engine='rejection', n_jobs=None, executor=None, output='geoseries', shuffle=False, weights=None, band=1):
 	"""
 	Create a GeoSeries of random points in polygons.
 
@@ -100,25 +552,733 @@ def generate_points_in_areas(gdf, values, units_per_point=1, seed=None):
 	----------
 	gdf : GeoDataFrame
 		The areas in which to create points
-	values : str or Series
-		The [possibly scaled] number of points to create in each area
+	values : str or Series, or list of these, or DataFrame
+		The [possibly scaled] number of points to create in each area.
+		Give several columns to create points for several categories
+		at once; each area is prepared and sampled only once, for the
+		total number of points over all categories.
 	units_per_point : numeric, optional
 		The rate to scale the values in point generation.
 	seed : int, optional
 		A random seed
+	engine : {'rejection', 'triangulation'}, default 'rejection'
+		How to sample points, see `generate_random_points_in_polygon`.
+	n_jobs : int, optional
+		Number of worker processes to spread the polygons across.  Set
+		to -1 to use all CPUs.  By default all work is done in this
+		process.
+	executor : concurrent.futures.Executor, optional
+		An existing executor to use instead of creating a process pool.
+	output : {'geoseries', 'arrays'}, default 'geoseries'
+		The form of the result.  'arrays' skips creating any point
+		geometries, which is much faster and smaller for very large
+		numbers of points.
+	shuffle : bool, default False
+		Randomly shuffle the order of the points, so that when points
+		of several categories are plotted, no category is consistently
+		drawn on top of the others.
+	weights : str or rasterio.DatasetReader, optional
+		A raster of weights, such as land cover or building density.
+		If given, points are placed in raster cells within each area in
+		proportion to their weight instead of uniformly, so that, for
+		example, no dots fall on water or in parks.  Areas are
+		reprojected to the raster's crs for sampling if needed, and the
+		points are returned in the crs of `gdf`.  With `n_jobs`, this
+		must be a path (or a dataset opened from one) so each worker can
+		open it.  Requires rasterio.
+	band : int, default 1
+		The band of `weights` to use.
+
+	Each polygon draws from its own random stream, spawned from `seed`
+	and keyed on the polygon's position in `gdf`, so the result for a
+	given seed is identical regardless of `n_jobs`.
 
 	Returns
 	-------
-	GeoSeries
+	GeoSeries or GeoDataFrame or tuple of ndarray
+		A GeoSeries of points, indexed by the index of `gdf` plus a
+		second level numbering the points within each area.  If there
+		are several categories, a GeoDataFrame with the same index and
+		a categorical 'category' column.  Or, if `output` is 'arrays',
+		the x and y coordinates of the points, the index value in `gdf`
+		of the area each is in and, for several categories, the integer
+		category code of each point.
 	"""
+	if output not in ('geoseries', 'arrays'):
+		raise ValueError(f"output must be 'geoseries' or 'arrays', not {output!r}")
 	geometry = gdf.geometry
-	if isinstance(values, str) and values in gdf.columns:
-		values = gdf[values]
-	new_values = (values / units_per_point).astype(int)
-	g = gpd.GeoDataFrame(data={'vals': new_values}, geometry=geometry)
-	a = g.apply(lambda row: tuple(generate_random_points_in_polygon(row['geometry'], row['vals'], seed)), 1)
-	b = gpd.GeoSeries(a.apply(pd.Series).stack(), crs=geometry.crs)
+	counts, categories = _point_counts(gdf, values, units_per_point)
+	entropy = np.random.SeedSequence(seed).entropy
+	geoms = geometry.values
+	raster_crs = None
+	if weights is not None:
+		raster, opened = _open_weights(weights)
+		raster_crs = raster.crs
+		if not opened and (executor is not None or (n_jobs is not None and n_jobs != 1)):
+			weights = raster.name
+		if opened:
+			raster.close()
+		if raster_crs is not None and geometry.crs is not None and geometry.crs != raster_crs:
+			geoms = geometry.to_crs(raster_crs).values
+		else:
+			raster_crs = None
+	xy = _sample_areas(
+		geoms, counts.sum(axis=1), seed=entropy, engine=engine, n_jobs=n_jobs, executor=executor,
+		weights=weights, band=band,
+	)
+	if raster_crs is not None:
+		from pyproj import Transformer
+		transformer = Transformer.from_crs(raster_crs, geometry.crs, always_xy=True)
+		xy = [np.column_stack(transformer.transform(p[:, 0], p[:, 1])) if len(p) else p for p in xy]
+	return _assemble_points(xy, counts, categories, geometry.index, geometry.crs, entropy, output, shuffle)
+
+
+def _assemble_points(xy, counts, categories, source_index, crs, entropy, output='geoseries', shuffle=False):
+	"""
+	Build the result of `generate_points_in_areas` from per-area coordinates.
+	"""
+	coords, positions = _concat_xy(xy)
+	starts = np.cumsum([0] + [len(p) for p in xy])[:-1]
+	within = np.arange(len(positions)) - starts[positions]
+	codes = None
+	if categories is not None:
+		# every sampler returns each area's points in random order, so
+		# categories can take them in turn
+		codes = np.repeat(np.tile(np.arange(len(categories)), len(xy)), counts.ravel())
+	if shuffle:
+		order = _shuffle_rng(entropy).permutation(len(positions))
+		coords, positions, within = coords[order], positions[order], within[order]
+		if codes is not None:
+			codes = codes[order]
+	source = source_index.take(positions)
+	if output == 'arrays':
+		if codes is None:
+			return coords[:, 0], coords[:, 1], np.asarray(source)
+		return coords[:, 0], coords[:, 1], np.asarray(source), codes
+	index = pd.MultiIndex.from_arrays(
+		[source, within],
+		names=[source_index.name, None],
+	)
+	b = gpd.GeoSeries(
+		gpd.points_from_xy(coords[:, 0], coords[:, 1]),
+		index=index,
+		crs=crs,
+	)
 	b.name = 'geometry'
-	return b
+	if codes is None:
+		return b
+	return gpd.GeoDataFrame(
+		{'category': pd.Categorical.from_codes(codes, categories)},
+		index=index,
+		geometry=b,
+	)
+
+def _category_name(values):
+	if isinstance(values, str):
+		return values
+	return getattr(values, 'name', None)
+
+
+def iter_points_in_areas(gdf, values, units_per_point=1, chunk_size=1_000_000, seed=None, engine='rejection', category=None, shuffle=False):
+	"""
+	Generate random points in polygons in fixed-size chunks.
+
+	This is a streaming version of `generate_points_in_areas`, for dot
+	sets too large to hold in memory all at once.  Peak memory depends
+	on `chunk_size`, not on the total number of points.
+
+	Parameters
+	----------
+	gdf : GeoDataFrame
+		The areas in which to create points
+	values : str or Series, or list of these, or DataFrame
+		The [possibly scaled] number of points to create in each area,
+		for one or several categories.
+	units_per_point : numeric, optional
+		The rate to scale the values in point generation.
+	chunk_size : int, default 1_000_000
+		The number of points in each chunk.  The last chunk may be
+		smaller.
+	seed : int, optional
+		A random seed
+	engine : {'rejection', 'triangulation'}, default 'rejection'
+		How to sample points, see `generate_random_points_in_polygon`.
+	category : str, optional
+		A label for the points when `values` is a single column, stored
+		in the 'category' column of each chunk.  Defaults to the name of
+		`values`.
+	shuffle : bool, default False
+		Randomly shuffle the order of the points within each chunk.
+
+	Yields
+	------
+	pandas.DataFrame
+		Columns 'x', 'y', 'source' (the index value in `gdf` of the area
+		each point is in) and, unless there is no category label,
+		'category'.
+
+	Polygons are sampled with the same per-polygon random streams as
+	`generate_points_in_areas`, so for a given seed the points are the
+	same regardless of `chunk_size`, and match the non-streaming result
+	for any polygon with no more than `MAX_BATCH_SIZE` points.
+	"""
+	chunk_size = int(chunk_size)
+	if chunk_size <= 0:
+		raise ValueError("chunk_size must be positive")
+	geometry = gdf.geometry
+	counts, categories = _point_counts(gdf, values, units_per_point)
+	if categories is None:
+		if category is None:
+			category = _category_name(values)
+		categories = None if category is None else [category]
+	entropy = np.random.SeedSequence(seed).entropy
+	shuffler = _shuffle_rng(entropy) if shuffle else None
+	index = geometry.index
+
+	pending = []
+	n_pending = 0
+
+	def _chunk(n):
+		nonlocal pending, n_pending
+		if len(pending) == 1:
+			xy, src, code = pending[0]
+		else:
+			xy, src, code = (np.concatenate(p) for p in zip(*pending))
+		pending = [(xy[n:], src[n:], code[n:])] if len(xy) > n else []
+		n_pending = len(xy) - n
+		xy, src, code = xy[:n], src[:n], code[:n]
+		if shuffler is not None:
+			order = shuffler.permutation(n)
+			xy, src, code = xy[order], src[order], code[order]
+		out = pd.DataFrame({
+			'x': xy[:, 0],
+			'y': xy[:, 1],
+			'source': index.take(src),
+		})
+		if categories is not None:
+			out['category'] = pd.Categorical.from_codes(code, categories)
+		return out
+
+	for i, (geom, n) in enumerate(zip(geometry.values, counts)):
+		total = int(n.sum())
+		if total <= 0:
+			continue
+		rng = _polygon_rng(entropy, i)
+		bounds = np.cumsum(n)
+		for start in range(0, total, MAX_BATCH_SIZE):
+			piece = min(total - start, MAX_BATCH_SIZE)
+			xy = _random_xy(geom, piece, seed=rng, engine=engine)
+			code = np.searchsorted(bounds, np.arange(start, start + len(xy)), side='right')
+			pending.append((xy, np.full(len(xy), i), code))
+			n_pending += len(xy)
+			while n_pending >= chunk_size:
+				yield _chunk(chunk_size)
+	if n_pending:
+		yield _chunk(n_pending)
+
+
+def _point_wkb(x, y):
+	"""
+	Encode point coordinates as little-endian WKB without creating geometries.
+
+	Returns
+	-------
+	bytes, ndarray
+		The concatenated WKB and the offsets of each point within it.
+	"""
+	n = len(x)
+	wkb = np.empty(n, dtype=np.dtype([('order', 'u1'), ('type', '<u4'), ('x', '<f8'), ('y', '<f8')]))
+	wkb['order'] = 1
+	wkb['type'] = 1
+	wkb['x'] = x
+	wkb['y'] = y
+	return wkb.tobytes(), np.arange(n + 1, dtype=np.int32) * wkb.dtype.itemsize
+
+
+def _geo_metadata(crs):
+	column = {
+		'encoding': 'WKB',
+		'geometry_types': ['Point'],
+	}
+	if crs is not None:
+		from pyproj import CRS
+		column['crs'] = CRS.from_user_input(crs).to_json_dict()
+	return {
+		'version': '1.0.0',
+		'primary_column': 'geometry',
+		'columns': {'geometry': column},
+	}
+
+
+def write_point_chunks(chunks, path, crs=None, format=None):
+	"""
+	Write chunks of points to GeoParquet or Arrow IPC, one chunk at a time.
+
+	Parameters
+	----------
+	chunks : iterable of DataFrame
+		Chunks with 'x' and 'y' columns, as yielded by
+		`iter_points_in_areas`.  Other columns are written as-is.
+	path : path-like
+		The file to write.
+	crs : pyproj.CRS or compatible, optional
+		The coordinate reference system of the points.
+	format : {'parquet', 'arrow'}, optional
+		The file format.  By default this is inferred from the file
+		extension, using Arrow IPC for '.arrow', '.feather' and '.ipc'
+		and GeoParquet otherwise.
+
+	Each chunk is written as its own Parquet row group or IPC record
+	batch, with the geometry encoded as WKB in a 'geometry' column and
+	GeoParquet 'geo' metadata in the schema, so the result can be read
+	back with `geopandas.read_parquet` or `geopandas.read_feather`.
+
+	Returns
+	-------
+	int
+		The number of points written.
+	"""
+	try:
+		import pyarrow as pa
+	except ImportError:
+		raise ImportError("writing point chunks requires pyarrow") from None
+	if format is None:
+		ext = os.path.splitext(str(path))[1].lower()
+		format = 'arrow' if ext in ('.arrow', '.feather', '.ipc') else 'parquet'
+	if format not in ('parquet', 'arrow'):
+		raise ValueError(f"format must be 'parquet' or 'arrow', not {format!r}")
+
+	metadata = {b'geo': json.dumps(_geo_metadata(crs)).encode()}
+	writer = None
+	schema = None
+	total = 0
+	try:
+		for chunk in chunks:
+			data, offsets = _point_wkb(chunk['x'].to_numpy(float), chunk['y'].to_numpy(float))
+			geometry = pa.Array.from_buffers(
+				pa.binary(), len(offsets) - 1, [None, pa.py_buffer(offsets), pa.py_buffer(data)],
+			)
+			table = pa.Table.from_pandas(chunk.drop(columns=['x', 'y']), preserve_index=False)
+			table = table.append_column('geometry', geometry)
+			if writer is None:
+				schema = table.schema.with_metadata(metadata)
+				if format == 'parquet':
+					import pyarrow.parquet as pq
+					writer = pq.ParquetWriter(path, schema)
+				else:
+					import pyarrow.ipc
+					writer = pa.ipc.new_file(path, schema)
+			table = table.cast(schema)
+			writer.write_table(table)
+			total += len(chunk)
+	finally:
+		if writer is not None:
+			writer.close()
+	return total
+
+
+def write_points_in_areas(gdf, values, path, units_per_point=1, chunk_size=1_000_000, seed=None, engine='rejection', category=None, shuffle=False, format=None):
+	"""
+	Generate random points in polygons straight to a file.
+
+	Points are generated by `iter_points_in_areas` and written by
+	`write_point_chunks` one chunk at a time, so the full set of
+	points is never held in memory.
+
+	Parameters
+	----------
+	gdf : GeoDataFrame
+		The areas in which to create points
+	values : str or Series, or list of these, or DataFrame
+		The [possibly scaled] number of points to create in each area
+	path : path-like
+		The GeoParquet or Arrow IPC file to write.
+	units_per_point, chunk_size, seed, engine, category, shuffle
+		See `iter_points_in_areas`.
+	format : {'parquet', 'arrow'}, optional
+		See `write_point_chunks`.
+
+	Returns
+	-------
+	int
+		The number of points written.
+	"""
+	chunks = iter_points_in_areas(
+		gdf, values, units_per_point=units_per_point, chunk_size=chunk_size,
+		seed=seed, engine=engine, category=category, shuffle=shuffle,
+	)
+	return write_point_chunks(chunks, path, crs=gdf.crs, format=format)
+
+
+class PreparedZones:
+	"""
+	A zone system prepared once for repeated dot density sampling.
+
+	Preparing a set of zones does all the per-polygon work that does
+	not depend on the number of points: preparing the geometries for
+	point-in-polygon tests, splitting sparse polygons over a grid (for
+	the 'rejection' engine) or triangulating them (for the
+	'triangulation' engine).  Sampling then only draws points.
+
+	For a given seed and engine, `sample` gives the same points as
+	`generate_points_in_areas`.
+
+	Parameters
+	----------
+	gdf : GeoDataFrame
+		The zones.  Non-geometry columns are kept, so they can be given
+		by name as values to `sample`.
+	engine : {'rejection', 'triangulation'}, default 'rejection'
+		How to sample points, see `generate_random_points_in_polygon`.
+	"""
+
+	def __init__(self, gdf, engine='rejection'):
+		if engine not in ENGINES:
+			raise ValueError(f"engine must be one of {ENGINES}, not {engine!r}")
+		self.engine = engine
+		self.index = gdf.index
+		self.crs = gdf.crs
+		self.data = pd.DataFrame(gdf.drop(columns=gdf.geometry.name))
+		self.geoms = np.asarray(gdf.geometry.values, dtype=object)
+		self._parts = [self._decompose(g) for g in self.geoms]
+		self._prepare()
+
+	def _decompose(self, geom):
+		if geom is None or geom.is_empty:
+			return None
+		if self.engine == 'triangulation':
+			return _triangulate(geom)
+		if _is_sparse(geom):
+			return _gridded_polygon(geom, 4)
+		return None
+
+	def _prepare(self):
+		if _prepare is None:  # shapely < 2 cannot keep prepared geometries
+			return
+		_prepare(self.geoms[[g is not None for g in self.geoms]])
+		if self.engine == 'rejection':
+			for part in self._parts:
+				if part is not None:
+					_prepare(part[0])
+
+	def __len__(self):
+		return len(self.geoms)
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self._prepare()
+
+	def save(self, path):
+		"""
+		Save the prepared zones to a file.
+
+		Parameters
+		----------
+		path : path-like
+		"""
+		import pickle
+		with open(path, 'wb') as f:
+			pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+	@classmethod
+	def load(cls, path):
+		"""
+		Load prepared zones saved by `save`.
+
+		Parameters
+		----------
+		path : path-like
+
+		Returns
+		-------
+		PreparedZones
+		"""
+		import pickle
+		with open(path, 'rb') as f:
+			zones = pickle.load(f)
+		if not isinstance(zones, cls):
+			raise TypeError(f"{path} does not contain {cls.__name__}")
+		return zones
+
+	def _random_xy(self, i, num_points, seed):
+		num_points = int(num_points)
+		part = self._parts[i]
+		if self.engine == 'triangulation':
+			if num_points <= 0 or part is None:
+				return np.empty((0, 2))
+			return _random_xy_in_triangles(part, num_points, seed=seed)
+		if part is None or num_points <= 5:
+			return _random_xy_in_polygon(self.geoms[i], num_points, seed=seed)
+		return _generate_random_points_in_gridded_polygons(*part, num_points, seed=seed)
+
+	def sample(self, values, units_per_point=1, seed=None, output='geoseries', shuffle=False):
+		"""
+		Create random points in the zones.
+
+		Parameters
+		----------
+		values : str or Series, or list of these, or DataFrame
+			The [possibly scaled] number of points to create in each
+			zone, for one or several categories.  Strings refer to
+			columns of the prepared GeoDataFrame.
+		units_per_point : numeric, optional
+			The rate to scale the values in point generation.
+		seed : int, optional
+			A random seed
+		output : {'geoseries', 'arrays'}, default 'geoseries'
+		shuffle : bool, default False
+			See `generate_points_in_areas`.
+
+		Returns
+		-------
+		GeoSeries or GeoDataFrame or tuple of ndarray
+			See `generate_points_in_areas`.
+		"""
+		if output not in ('geoseries', 'arrays'):
+			raise ValueError(f"output must be 'geoseries' or 'arrays', not {output!r}")
+		counts, categories = _point_counts(self.data, values, units_per_point)
+		entropy = np.random.SeedSequence(seed).entropy
+		xy = [
+			self._random_xy(i, n, _polygon_rng(entropy, i))
+			for i, n in enumerate(counts.sum(axis=1))
+		]
+		return _assemble_points(xy, counts, categories, self.index, self.crs, entropy, output, shuffle)
+
+
+def rasterize_dots(x, y, extent, shape, codes=None, n_categories=1):
+	"""
+	Count points falling in each pixel of an image.
+
+	Parameters
+	----------
+	x, y : array-like
+		Point coordinates.
+	extent : (left, right, bottom, top)
+		The extent of the image, in the same coordinates as the points.
+	shape : (int, int)
+		The height and width of the image, in pixels.
+	codes : array-like of int, optional
+		The category code of each point.
+	n_categories : int, default 1
+		The number of categories.
+
+	Returns
+	-------
+	ndarray
+		Shape (n_categories, height, width) array of point counts, with
+		the first row of pixels at the top of the image.  Points outside
+		the extent are ignored.
+	"""
+	left, right, bottom, top = extent
+	height, width = shape
+	col = np.floor((np.asarray(x, dtype=float) - left) / (right - left) * width)
+	row = np.floor((top - np.asarray(y, dtype=float)) / (top - bottom) * height)
+	inside = (col >= 0) & (col < width) & (row >= 0) & (row < height)
+	pixel = row[inside].astype(np.intp) * width + col[inside].astype(np.intp)
+	if codes is not None:
+		pixel += np.asarray(codes, dtype=np.intp)[inside] * (height * width)
+	counts = np.bincount(pixel, minlength=n_categories * height * width)
+	return counts.reshape(n_categories, height, width)
+
+
+def shade_dots(counts, colors, alpha=0.5):
+	"""
+	Composite per-category pixel counts into an RGBA image.
+
+	Each pixel's color is the mix of the category colors weighted by
+	their counts, and its opacity is that of `alpha`-transparent dots
+	stacked as many times as there are points in the pixel.
+
+	Parameters
+	----------
+	counts : ndarray
+		Shape (n_categories, height, width) array of point counts, as
+		from `rasterize_dots`.
+	colors : list
+		A matplotlib color for each category.
+	alpha : float, default 0.5
+		The opacity of a single dot.
+
+	Returns
+	-------
+	ndarray
+		Shape (height, width, 4) RGBA image.
+	"""
+	from matplotlib.colors import to_rgb
+	rgb = np.array([to_rgb(c) for c in colors])
+	total = counts.sum(axis=0)
+	image = np.zeros(total.shape + (4,))
+	with np.errstate(invalid='ignore', divide='ignore'):
+		image[..., :3] = np.tensordot(counts, rgb, axes=(0, 0)) / total[..., None]
+	image[total == 0, :3] = 0
+	image[..., 3] = 1 - (1 - alpha) ** total
+	return image
+
+
+def _dot_sources(data, values, units_per_point, seed, engine, chunk_size, categories):
+	"""
+	Get the crs, extent, category labels and chunks of dots to draw.
+	"""
+	if isinstance(data, tuple):
+		x, y = data[0], data[1]
+		codes = data[3] if len(data) > 3 else None
+		if categories is None and codes is not None:
+			categories = list(range(int(np.max(codes, initial=-1)) + 1))
+		bounds = (np.min(x), np.min(y), np.max(x), np.max(y)) if len(x) else (0, 0, 1, 1)
+		return None, bounds, categories, [(x, y, codes)]
+	if values is None:
+		geometry = data.geometry
+		codes = None
+		if isinstance(data, gpd.GeoDataFrame) and 'category' in data.columns:
+			category = pd.Categorical(data['category'])
+			codes = category.codes
+			categories = list(category.categories)
+		return data.crs, data.total_bounds, categories, [(geometry.x.values, geometry.y.values, codes)]
+	chunks = iter_points_in_areas(
+		data, values, units_per_point=units_per_point, chunk_size=chunk_size, seed=seed, engine=engine,
+	)
+	_, cats = _point_counts(data, values, units_per_point)
+	if cats is not None:
+		categories = cats
+	return data.crs, data.total_bounds, categories, (
+		(c['x'].values, c['y'].values, c['category'].cat.codes.values if cats is not None else None)
+		for c in chunks
+	)
+
+
+def _transform_chunks(chunks, crs_from, crs_to):
+	from pyproj import Transformer
+	transformer = Transformer.from_crs(crs_from, crs_to, always_xy=True)
+	for x, y, codes in chunks:
+		x, y = transformer.transform(x, y)
+		yield x, y, codes
+
+
+def plot_dotdensity(
+		data,
+		values=None,
+		units_per_point=1,
+		*,
+		ax=None,
+		figsize=None,
+		colors=None,
+		alpha=0.5,
+		basemap=False,
+		legend=True,
+		categories=None,
+		seed=None,
+		engine='rejection',
+		chunk_size=1_000_000,
+		**kwargs,
+):
+	"""
+	Draw a dot density map as an image rather than as markers.
+
+	The dots are binned into an image the size of the axes in pixels,
+	one layer per category, and the layers are composited and drawn
+	with a single `imshow`.  This is far faster and lighter than
+	plotting each dot as a marker when there are millions of them.
+
+	Parameters
+	----------
+	data : GeoDataFrame or GeoSeries or tuple
+		Either areas, in which case `values` must be given and dots are
+		generated in chunks by `iter_points_in_areas` and binned as they
+		are made, without ever creating Point geometries or holding all
+		the dots in memory; or points, as returned by
+		`generate_points_in_areas` (including a 'category' column for
+		several categories), or the arrays it returns with
+		`output='arrays'`.
+	values : str or Series, or list of these, or DataFrame, optional
+		The [possibly scaled] number of dots in each area, for one or
+		several categories.
+	units_per_point : numeric, optional
+		The rate to scale the values in point generation.
+	ax : AxesSubplot, optional
+		The axes to draw on.  If not given, a new figure is created.
+		If the axes have a `crs`, the dots are converted to it.
+	figsize : tuple, optional
+		The size of a new figure.
+	colors : list or dict, optional
+		A matplotlib color for each category, as a list in category order
+		or a dict keyed by category.  Defaults to the 'tab10' colors.
+	alpha : float, default 0.5
+		The opacity of a single dot.  Pixels holding many dots become
+		more opaque.
+	basemap : bool or str or dict, default False
+		Whether to render a basemap behind the dots, as for
+		`GeoDataFrame.plot`.
+	legend : bool, default True
+		Add a legend when there are several categories.
+	categories : list, optional
+		Labels for the category codes, when `data` is a tuple of arrays.
+	seed, engine, chunk_size
+		Passed to `iter_points_in_areas` when dots are generated.
+	**kwargs
+		Other arguments passed to `imshow`.
+
+	Returns
+	-------
+	AxesSubplot
+	"""
+	from matplotlib import pyplot as plt
+	from pyproj import CRS
+
+	crs, bounds, categories, chunks = _dot_sources(
+		data, values, units_per_point, seed, engine, chunk_size, categories,
+	)
+	if ax is None:
+		fig, ax = plt.subplots(figsize=figsize)
+		ax.set_aspect('equal')
+		minx, miny, maxx, maxy = bounds
+		ax.set_xlim(minx, maxx)
+		ax.set_ylim(miny, maxy)
+	ax_crs = getattr(ax, 'crs', None)
+	if ax_crs is not None:
+		if crs is not None and not CRS.from_user_input(crs).equals(ax_crs):
+			# bin the dots in the axes' crs, as `GeoDataFrame.plot` would
+			chunks = _transform_chunks(chunks, crs, ax_crs)
+		crs = ax_crs
+
+	ax.apply_aspect()
+	left, right = ax.get_xlim()
+	bottom, top = ax.get_ylim()
+	window = ax.get_window_extent()
+	shape = (max(int(round(window.height)), 1), max(int(round(window.width)), 1))
+	extent = (left, right, bottom, top)
+
+	n_categories = len(categories) if categories is not None else 1
+	counts = np.zeros((n_categories,) + shape, dtype=np.int64)
+	for x, y, codes in chunks:
+		counts += rasterize_dots(x, y, extent, shape, codes=codes, n_categories=n_categories)
+
+	if colors is None:
+		colors = [plt.get_cmap('tab10')(i % 10) for i in range(n_categories)]
+	elif isinstance(colors, dict):
+		colors = [colors[c] for c in categories]
+	elif isinstance(colors, str):
+		colors = [colors]
+
+	if basemap:
+		from .basemap import add_basemap
+		if isinstance(basemap, str):
+			basemap = {'tiles': basemap}
+		if basemap is True:
+			basemap = {}
+		ax = add_basemap(ax, **{'crs': crs, **basemap})
+
+	kwargs.setdefault('interpolation', 'nearest')
+	kwargs.setdefault('zorder', 2)
+	ax.imshow(shade_dots(counts, colors, alpha), extent=extent, origin='upper', **kwargs)
+	ax.set_xlim(left, right)
+	ax.set_ylim(bottom, top)
+
+	if legend and categories is not None and n_categories > 1:
+		from matplotlib.patches import Patch
+		ax.legend(handles=[Patch(color=c, label=str(k)) for c, k in zip(colors, categories)])
+	if not hasattr(ax, 'crs') and crs is not None:
+		ax.crs = crs
+	return ax
+
 
 gpd.GeoDataFrame.dotdensity = generate_points_in_areas
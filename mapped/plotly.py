@@ -10,7 +10,6 @@ except ImportError:
 
 import pandas as pd
 import geopandas as gpd
-import contextily as ctx
 import numpy as np
 import os
 
@@ -30,25 +29,80 @@ def load_mapbox_token(mapbox_token_file=".mapbox_token"):
 
 load_mapbox_token()
 
-def good_zoom(gdf, low_tiles=1, high_tiles=3):
-	"Find a good initial zoom level."
+_WEB_MERCATOR_LIMIT = 20037508.342789244
+_EARTH_RADIUS = 6378137.0
+
+def _web_mercator_bounds(gdf):
+	"""
+	Get the total bounds of a GeoDataFrame in web mercator coordinates.
+
+	Frames already in epsg:4326 are converted with the closed-form
+	mercator equations, without building or reprojecting any geometry.
+	"""
 	crs = gdf.crs
-	total_bounds = gdf.total_bounds
 	if crs is None:
-		raise ValueError
-	from shapely.geometry import box
-	mapping_area = gpd.GeoDataFrame(geometry=[box(*total_bounds)], crs=crs).to_crs(epsg=3857)
-	xmin_, ymin_, xmax_, ymax_ = mapping_area.total_bounds  # w s e n
-	zoom = 1
-	low_zoom = 1
-	tiles = {}
-	tiles[zoom] = howmany = ctx.howmany(xmin_, ymin_, xmax_, ymax_, zoom, verbose=False)
-	while howmany <= high_tiles:
-		zoom += 1
-		if howmany <= low_tiles:
-			low_zoom += 1
-		tiles[zoom] = howmany = ctx.howmany(xmin_, ymin_, xmax_, ymax_, zoom, verbose=False)
-	return zoom - 1 + ((high_tiles - tiles[zoom - 1]) / (howmany - tiles[zoom - 1]))
+		raise ValueError("crs is not set")
+	xmin, ymin, xmax, ymax = gdf.total_bounds
+	epsg = crs.to_epsg() if hasattr(crs, 'to_epsg') else None
+	if epsg == 3857:
+		return xmin, ymin, xmax, ymax
+	if epsg == 4326:
+		lon = np.radians([xmin, xmax])
+		lat = np.radians(np.clip([ymin, ymax], -85.0511287798, 85.0511287798))
+		x = _EARTH_RADIUS * lon
+		y = _EARTH_RADIUS * np.log(np.tan(np.pi / 4 + lat / 2))
+		return x[0], y[0], x[1], y[1]
+	from pyproj import Transformer
+	transformer = Transformer.from_crs(crs, "EPSG:3857", always_xy=True)
+	x, y = transformer.transform([xmin, xmin, xmax, xmax], [ymin, ymax, ymin, ymax])
+	return min(x), min(y), max(x), max(y)
+
+
+def good_zoom(gdf, low_tiles=1, high_tiles=3, width=None, height=None):
+	"""
+	Find a good initial zoom level.
+
+	Without a figure size, this is the fractional zoom level at which
+	about `high_tiles` map tiles cover the extent of `gdf`, computed
+	directly from the web mercator extent with tile index arithmetic
+	for all zoom levels at once.  If the figure's `width` and `height`
+	in pixels are both given, the zoom is instead the level at which
+	the extent just fits in the figure.
+
+	Parameters
+	----------
+	gdf : GeoDataFrame
+		The data to be mapped, preferably already in epsg:4326.
+	low_tiles, high_tiles : int
+		The target number of tiles.
+	width, height : int, optional
+		The figure size, in pixels.
+
+	Returns
+	-------
+	float
+	"""
+	xmin_, ymin_, xmax_, ymax_ = _web_mercator_bounds(gdf)  # w s e n
+	world = 2 * _WEB_MERCATOR_LIMIT
+
+	if width is not None and height is not None:
+		fit = min(width / max(xmax_ - xmin_, 1e-9), height / max(ymax_ - ymin_, 1e-9))
+		# mapbox renders the world 512 pixels wide at zoom 0
+		return float(np.clip(np.log2(fit * world / 512), 0, 22))
+
+	zooms = np.arange(0, 31)
+	n = 2.0 ** zooms
+	eps = 1e-9 * world
+	def _index(v):
+		return np.clip(np.floor(v / world * n), 0, n - 1)
+	nx = _index(xmax_ - eps + _WEB_MERCATOR_LIMIT) - _index(xmin_ + _WEB_MERCATOR_LIMIT) + 1
+	ny = _index(_WEB_MERCATOR_LIMIT - ymin_ - eps) - _index(_WEB_MERCATOR_LIMIT - ymax_) + 1
+	tiles = nx * ny
+	above = np.nonzero((tiles > high_tiles) & (zooms >= 1))[0]
+	if len(above) == 0:
+		return float(zooms[-1])
+	zoom = zooms[above[0]]
+	return zoom - 1 + ((high_tiles - tiles[zoom - 1]) / (tiles[zoom] - tiles[zoom - 1]))
 
 
 def _get_color(name):
@@ -230,7 +284,7 @@ def plotly_choropleth(
 
 	try:
 		if zoom == 'auto':
-			zoom = good_zoom(gdf_p)
+			zoom = good_zoom(gdf_p, width=kwargs.get('width'), height=kwargs.get('height'))
 	except:
 		zoom = None
 
@@ -277,6 +331,7 @@ def plotly_choropleth(
 		plotly_scatter(
 			gdf_p,
 			text=text,
+			zoom=zoom,
 			mapbox_style=mapbox_style,
 			fig=fig,
 			suppress_hover=True,
@@ -404,7 +459,7 @@ def plotly_heatmap(
 
 	try:
 		if zoom == 'auto':
-			zoom = good_zoom(gdf_p)
+			zoom = good_zoom(gdf_p, width=kwargs.get('width'), height=kwargs.get('height'))
 	except:
 		zoom = None
 
@@ -556,7 +611,7 @@ def plotly_scatter(
 
 	try:
 		if zoom == 'auto':
-			zoom = good_zoom(gdf_p)
+			zoom = good_zoom(gdf_p, width=kwargs.get('width'), height=kwargs.get('height'))
 	except:
 		zoom = None
 
@@ -729,7 +784,7 @@ def plotly_lines(
 
 	try:
 		if zoom == 'auto':
-			zoom = good_zoom(gdf)
+			zoom = good_zoom(gdf, width=kwargs.get('width'), height=kwargs.get('height'))
 	except:
 		zoom = None
 
@@ -0,0 +1,614 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import glob
+import math
+import mmap
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image
+import contextily as ctx
+
+from . import caching
+
+WEB_MERCATOR_LIMIT = 20037508.342789244
+
+DEFAULT_HOST_LIMIT = 8
+host_limits = {}
+
+
+def set_host_limit(host, limit=DEFAULT_HOST_LIMIT):
+	"""
+	Set the maximum number of concurrent connections to a tile server.
+
+	Parameters
+	----------
+	host : str
+		The host name, e.g. "a.basemaps.cartocdn.com".  Give None to
+		change the default limit used for all hosts without an
+		explicit limit.
+	limit : int
+		The maximum number of simultaneous requests to this host.
+
+	The new limit applies to the next request made to the host, also
+	by fetchers that have already connected to it.
+	"""
+	global DEFAULT_HOST_LIMIT
+	if limit < 1:
+		raise ValueError("limit must be a positive integer")
+	if host is None:
+		DEFAULT_HOST_LIMIT = int(limit)
+	else:
+		host_limits[host] = int(limit)
+
+
+def resolve_source(tiles):
+	"""
+	Resolve a tile source given by name, url, or local path.
+
+	Parameters
+	----------
+	tiles : str or dict or LocalTileSource
+		A dotted provider name in `contextily.providers` (e.g.
+		"CartoDB.Positron"), a provider dict, a url, or a local
+		tile source (see `open_tile_source`).
+
+	Returns
+	-------
+	source : dict or str or LocalTileSource
+	attribution : str or None
+	"""
+	local_tiles = open_tile_source(tiles)
+	if local_tiles is not None:
+		return local_tiles, local_tiles.attribution
+
+	providers = None
+	if isinstance(tiles, str):
+		providers = ctx.providers
+		tiles_dots = tiles.split('.')
+		while len(tiles_dots):
+			if tiles_dots[0] in providers:
+				providers = providers[tiles_dots[0]]
+				try:
+					tiles_dots = tiles_dots[1:]
+				except IndexError:
+					tiles_dots = []
+			else:
+				providers = None
+				break
+		while isinstance(providers, dict) and 'url' not in providers and len(providers):
+			providers = next(iter(providers.values()))
+		if not isinstance(providers, dict) or len(providers) == 0:
+			providers = None
+	elif isinstance(tiles, dict):
+		providers = tiles
+
+	if providers is not None:
+		return providers, providers.get('attribution', None)
+	return getattr(getattr(ctx, 'sources', None), tiles, tiles), None
+
+
+def provider_name(provider):
+	"""
+	Get the name used to key cached tiles for a tile provider.
+	"""
+	if isinstance(provider, str):
+		return provider
+	if isinstance(provider, LocalTileSource):
+		return provider.name
+	return provider.get('name', provider.get('url'))
+
+
+def tile_url(provider, x, y, z):
+	"""
+	Build the url for one tile.
+
+	Parameters
+	----------
+	provider : dict or str
+		A contextily provider, or a url template with `{x}`, `{y}`
+		and `{z}` placeholders.
+	x, y, z : int
+
+	Returns
+	-------
+	str
+	"""
+	if isinstance(provider, str):
+		return provider.format(x=x, y=y, z=z, s="a", r="")
+	if hasattr(provider, 'build_url'):
+		return provider.build_url(x=x, y=y, z=z)
+	subdomains = provider.get("subdomains", "abc")
+	fmt = {
+		**provider,
+		'x': x,
+		'y': y,
+		'z': z,
+		's': subdomains[(x + y) % len(subdomains)] if subdomains else "",
+		'r': provider.get("r", ""),
+	}
+	return provider['url'].format(**fmt)
+
+
+def tile_range(left, bottom, right, top, zoom):
+	"""
+	Find the range of tile indexes covering a web mercator extent.
+
+	Returns
+	-------
+	x0, x1, y0, y1 : int
+		Inclusive ranges of tile column and row indexes.
+	"""
+	n = 2 ** zoom
+	size = 2 * WEB_MERCATOR_LIMIT / n
+	def _clip(i):
+		return int(min(max(i, 0), n - 1))
+	x0 = _clip(math.floor((left + WEB_MERCATOR_LIMIT) / size))
+	x1 = _clip(math.ceil((right + WEB_MERCATOR_LIMIT) / size) - 1)
+	y0 = _clip(math.floor((WEB_MERCATOR_LIMIT - top) / size))
+	y1 = _clip(math.ceil((WEB_MERCATOR_LIMIT - bottom) / size) - 1)
+	return x0, max(x0, x1), y0, max(y0, y1)
+
+
+def tiles_for_bounds(left, bottom, right, top, zoom):
+	"""
+	List the tiles covering a web mercator extent.
+
+	Returns
+	-------
+	list of (z, x, y) tuples
+	"""
+	x0, x1, y0, y1 = tile_range(left, bottom, right, top, zoom)
+	return [(zoom, x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+
+
+def _calculate_zoom(left, bottom, right, top):
+	# same rule as contextily: about four tiles across the larger dimension
+	span = max(right - left, top - bottom, 1e-9)
+	return int(np.clip(np.ceil(np.log2(2 * 2 * WEB_MERCATOR_LIMIT / span)), 0, 30))
+
+
+def auto_zoom(left, bottom, right, top, width, height, max_tiles=None, tile_size=256, min_zoom=0, max_zoom=30):
+	"""
+	Choose a zoom level to match the resolution a map is rendered at.
+
+	This is the lowest zoom level at which the map tiles have at least
+	as many pixels per unit distance as the rendered map, so that the
+	tiles are not downloaded at far more detail than can be shown.
+
+	Parameters
+	----------
+	left, bottom, right, top : float
+		The extent, in web mercator (epsg:3857) coordinates.
+	width, height : float
+		The rendered size of the map, in pixels.
+	max_tiles : int, optional
+		If given, the zoom level is reduced as needed so that no more
+		than this many tiles are used.
+	tile_size : int, default 256
+		The size of each tile, in pixels.
+	min_zoom, max_zoom : int
+		Limits on the zoom level.
+
+	Returns
+	-------
+	int
+	"""
+	meters_per_pixel = max(
+		(right - left) / max(width, 1),
+		(top - bottom) / max(height, 1),
+		1e-9,
+	)
+	zoom = math.ceil(math.log2(2 * WEB_MERCATOR_LIMIT / (tile_size * meters_per_pixel)) - 1e-9)
+	zoom = int(min(max(zoom, min_zoom), max_zoom))
+	if max_tiles is not None:
+		while zoom > min_zoom:
+			x0, x1, y0, y1 = tile_range(left, bottom, right, top, zoom)
+			if (x1 - x0 + 1) * (y1 - y0 + 1) <= max_tiles:
+				break
+			zoom -= 1
+	return zoom
+
+
+def _validate_zoom(zoom, provider):
+	if isinstance(provider, dict):
+		zoom = min(max(zoom, provider.get('min_zoom', 0)), provider.get('max_zoom', 30))
+	elif isinstance(provider, LocalTileSource):
+		zoom = min(max(zoom, provider.min_zoom), provider.max_zoom)
+	return int(zoom)
+
+
+def decode_tile(content):
+	"""
+	Decode raw tile image bytes into an RGBA array.
+
+	Parameters
+	----------
+	content : bytes or file-like
+		The encoded image, either as bytes or as a readable
+		file-like object such as a memory-mapped file.
+	"""
+	if hasattr(content, 'read'):
+		content.seek(0)
+		image_stream = content
+	else:
+		image_stream = io.BytesIO(content)
+	with image_stream:
+		image = Image.open(image_stream).convert("RGBA")
+		array = np.asarray(image)
+		image.close()
+	return array
+
+
+class LocalTileSource:
+	"""
+	Base class for map tiles that are read from local files.
+
+	Subclasses implement `read_tiles`, which reads a whole batch
+	of tiles at once.
+	"""
+
+	name = None
+	attribution = None
+	min_zoom = 0
+	max_zoom = 30
+
+	def read_tiles(self, tiles):
+		"""
+		Read the encoded images for a set of tiles.
+
+		Parameters
+		----------
+		tiles : list of (z, x, y) tuples
+
+		Returns
+		-------
+		list
+			The encoded images (bytes or file-like), in the same
+			order as `tiles`, with None for any missing tile.
+		"""
+		raise NotImplementedError
+
+	def __repr__(self):
+		return f"<mapped.tiles.{self.__class__.__name__} {self.name!r}>"
+
+
+class MBTilesSource(LocalTileSource):
+	"""
+	Read map tiles from an MBTiles (SQLite) file.
+
+	Each zoom level in a request is read with a single range query.
+
+	Parameters
+	----------
+	path : Path-like
+		The MBTiles file.
+	"""
+
+	def __init__(self, path):
+		self.path = os.fspath(path)
+		self.name = self.path
+		self._db = sqlite3.connect(
+			f"file:{self.path}?mode=ro",
+			uri=True,
+			check_same_thread=False,
+		)
+		self._lock = threading.Lock()
+		try:
+			metadata = dict(self._db.execute("SELECT name, value FROM metadata").fetchall())
+		except sqlite3.DatabaseError:
+			metadata = {}
+		self.metadata = metadata
+		self.attribution = metadata.get('attribution', None)
+		self.min_zoom = int(metadata.get('minzoom', 0))
+		self.max_zoom = int(metadata.get('maxzoom', 30))
+
+	def read_tiles(self, tiles):
+		found = {}
+		for z in sorted(set(t[0] for t in tiles)):
+			xs = [t[1] for t in tiles if t[0] == z]
+			ys = [(2 ** z - 1 - t[2]) for t in tiles if t[0] == z]
+			with self._lock:
+				rows = self._db.execute(
+					"SELECT tile_column, tile_row, tile_data FROM tiles "
+					"WHERE zoom_level=? AND tile_column BETWEEN ? AND ? AND tile_row BETWEEN ? AND ?",
+					(z, min(xs), max(xs), min(ys), max(ys)),
+				).fetchall()
+			for x, tms_y, data in rows:
+				found[(z, x, 2 ** z - 1 - tms_y)] = data
+		return [found.get(t, None) for t in tiles]
+
+
+class DirectoryTileSource(LocalTileSource):
+	"""
+	Read map tiles from a directory tree of image files.
+
+	Tile files are memory-mapped rather than read into Python
+	byte strings.
+
+	Parameters
+	----------
+	path : Path-like
+		Either a directory laid out as `{z}/{x}/{y}.png`, or a path
+		template containing `{z}`, `{x}` and `{y}` placeholders.
+		For a directory, the file extension is detected from the
+		files found in it.
+	tms : bool, default False
+		Set to True if tile rows are numbered from the south, as in
+		the TMS specification, instead of from the north.
+	"""
+
+	def __init__(self, path, tms=False):
+		path = os.fspath(path)
+		if "{z}" not in path:
+			ext = ".png"
+			for found in glob.iglob(os.path.join(path, "*", "*", "*.*")):
+				ext = os.path.splitext(found)[1]
+				break
+			path = os.path.join(path, "{z}", "{x}", "{y}" + ext)
+		self.template = path
+		self.name = path
+		self.tms = tms
+		root = path.split("{z}")[0] or "."
+		if os.path.isdir(root):
+			zooms = [int(d) for d in os.listdir(root) if d.isdigit()]
+			if zooms:
+				self.min_zoom = min(zooms)
+				self.max_zoom = max(zooms)
+
+	def _read(self, z, x, y):
+		if self.tms:
+			y = 2 ** z - 1 - y
+		try:
+			with open(self.template.format(z=z, x=x, y=y), 'rb') as f:
+				return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		except (FileNotFoundError, ValueError):
+			return None
+
+	def read_tiles(self, tiles):
+		return [self._read(*t) for t in tiles]
+
+
+def open_tile_source(path):
+	"""
+	Open a local tile source.
+
+	Parameters
+	----------
+	path : Path-like or LocalTileSource
+		An MBTiles file, a directory of tiles, or a path template
+		containing `{z}`, `{x}` and `{y}` placeholders.
+
+	Returns
+	-------
+	LocalTileSource or None
+		None is returned if `path` is not a recognized local tile source.
+	"""
+	if isinstance(path, LocalTileSource):
+		return path
+	if not isinstance(path, (str, os.PathLike)):
+		return None
+	path = os.fspath(path)
+	if path[:4] == "http":
+		return None
+	if "{z}" in path and "{x}" in path and "{y}" in path:
+		return DirectoryTileSource(path)
+	if os.path.isdir(path):
+		return DirectoryTileSource(path)
+	if os.path.isfile(path):
+		with open(path, 'rb') as f:
+			if f.read(16) == b"SQLite format 3\x00":
+				return MBTilesSource(path)
+	return None
+
+
+class TileFetcher:
+	"""
+	A concurrent map tile downloader.
+
+	Tiles are requested from a bounded thread pool, and each tile server
+	host gets its own `requests.Session`, so connections are kept alive
+	and reused across tiles.  The number of simultaneous requests to
+	each host is limited by `host_limits` (see `set_host_limit`).
+	Tiles found in the `mapped.caching.tile_cache` are not downloaded,
+	and newly downloaded tiles are added to it.
+
+	Parameters
+	----------
+	max_workers : int, default 16
+		The size of the thread pool.
+	headers : dict, optional
+		Extra headers to send with each tile request.
+	timeout : float, default 30
+		Seconds to wait for a tile server to respond.
+	max_retries : int, default 2
+		Number of times to retry a failed tile request.
+	"""
+
+	def __init__(self, max_workers=16, headers=None, timeout=30, max_retries=2):
+		self.max_workers = max_workers
+		self.headers = headers or {}
+		self.timeout = timeout
+		self.max_retries = max_retries
+		self._sessions = {}
+		self._semaphores = {}
+		self._limits = {}
+		self._lock = threading.Lock()
+
+	def _host(self, host):
+		# the limit is looked up on every request, so `set_host_limit`
+		# also applies to hosts this fetcher is already connected to
+		limit = host_limits.get(host, DEFAULT_HOST_LIMIT)
+		with self._lock:
+			if host not in self._sessions:
+				session = requests.Session()
+				session.headers["user-agent"] = "contextily-mapped-py"
+				session.headers.update(self.headers)
+				self._sessions[host] = session
+			if self._limits.get(host) != limit:
+				# requests in flight keep the adapter and semaphore they started with
+				adapter = HTTPAdapter(
+					pool_connections=1,
+					pool_maxsize=limit,
+					max_retries=self.max_retries,
+				)
+				self._sessions[host].mount("http://", adapter)
+				self._sessions[host].mount("https://", adapter)
+				self._semaphores[host] = threading.BoundedSemaphore(limit)
+				self._limits[host] = limit
+			return self._sessions[host], self._semaphores[host]
+
+	def fetch_one(self, provider, z, x, y):
+		"""
+		Get the raw image bytes for one tile.
+		"""
+		name = provider_name(provider)
+		caching._ensure_cache()
+		tile_cache = caching.tile_cache
+		if tile_cache is not None:
+			content = tile_cache.get(name, z, x, y)
+			if content is not None:
+				return content
+		url = tile_url(provider, x, y, z)
+		session, semaphore = self._host(urlsplit(url).netloc)
+		with semaphore:
+			response = session.get(url, timeout=self.timeout)
+		response.raise_for_status()
+		content = response.content
+		if tile_cache is not None:
+			try:
+				tile_cache.put(name, z, x, y, content)
+			except sqlite3.Error:
+				pass  # a failure to cache should not fail the download
+		return content
+
+	def fetch(self, provider, tiles, decode=True):
+		"""
+		Get a set of tiles concurrently.
+
+		Parameters
+		----------
+		provider : dict or str
+			A contextily provider, or a url template.
+		tiles : list of (z, x, y) tuples
+		decode : bool, default True
+			Whether to decode the tiles into RGBA arrays.
+
+		Returns
+		-------
+		list
+			The decoded tiles (or raw bytes), in the same order as `tiles`.
+		"""
+		def _get(tile):
+			content = self.fetch_one(provider, *tile)
+			return decode_tile(content) if decode else content
+		if len(tiles) <= 1:
+			return [_get(t) for t in tiles]
+		with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tiles))) as pool:
+			return list(pool.map(_get, tiles))
+
+	def close(self):
+		with self._lock:
+			for session in self._sessions.values():
+				session.close()
+			self._sessions.clear()
+			self._semaphores.clear()
+			self._limits.clear()
+
+
+_fetcher = None
+
+def get_fetcher():
+	"""
+	Get the shared TileFetcher, creating it if needed.
+	"""
+	global _fetcher
+	if _fetcher is None:
+		_fetcher = TileFetcher()
+	return _fetcher
+
+
+def merge_tiles(tiles, arrays):
+	"""
+	Merge a set of tiles into a single image.
+
+	Parameters
+	----------
+	tiles : list of (z, x, y) tuples
+	arrays : list of ndarray
+		The decoded RGBA tile images, in the same order as `tiles`.
+		Missing tiles may be given as None, and are left transparent.
+
+	Returns
+	-------
+	img : ndarray
+	extent : tuple
+		The (left, right, bottom, top) web mercator extent of `img`.
+	"""
+	z = tiles[0][0]
+	xs = np.array([t[1] for t in tiles])
+	ys = np.array([t[2] for t in tiles])
+	x0, y0 = xs.min(), ys.min()
+	first = next((arr for arr in arrays if arr is not None), None)
+	if first is None:
+		raise ValueError("none of the map tiles for this extent are available")
+	h, w = first.shape[:2]
+	bands = first.shape[2] if first.ndim == 3 else 1
+	img = np.zeros(((ys.max() - y0 + 1) * h, (xs.max() - x0 + 1) * w, bands), dtype=np.uint8)
+	for x, y, arr in zip(xs, ys, arrays):
+		if arr is None:
+			continue
+		if arr.ndim == 2:
+			arr = arr[:, :, None]
+		img[(y - y0) * h:(y - y0 + 1) * h, (x - x0) * w:(x - x0 + 1) * w, :] = arr[:h, :w, :bands]
+	size = 2 * WEB_MERCATOR_LIMIT / 2 ** z
+	extent = (
+		-WEB_MERCATOR_LIMIT + x0 * size,
+		-WEB_MERCATOR_LIMIT + (xs.max() + 1) * size,
+		WEB_MERCATOR_LIMIT - (ys.max() + 1) * size,
+		WEB_MERCATOR_LIMIT - y0 * size,
+	)
+	return img, extent
+
+
+def bounds2img(left, bottom, right, top, zoom='auto', source=None, fetcher=None):
+	"""
+	Get a mosaic of map tiles covering a web mercator extent.
+
+	Parameters
+	----------
+	left, bottom, right, top : float
+		The extent, in web mercator (epsg:3857) coordinates.
+	zoom : int or 'auto'
+	source : dict or str or LocalTileSource
+		A contextily provider, a url template, or a local tile source.
+	fetcher : TileFetcher, optional
+		Defaults to the shared fetcher.
+
+	Returns
+	-------
+	img : ndarray
+	extent : tuple
+		The (left, right, bottom, top) web mercator extent of `img`.
+	"""
+	if zoom == 'auto':
+		zoom = _calculate_zoom(left, bottom, right, top)
+	zoom = _validate_zoom(zoom, source)
+	tiles = tiles_for_bounds(left, bottom, right, top, zoom)
+	if isinstance(source, LocalTileSource):
+		arrays = [
+			(decode_tile(content) if content is not None else None)
+			for content in source.read_tiles(tiles)
+		]
+	else:
+		if fetcher is None:
+			fetcher = get_fetcher()
+		arrays = fetcher.fetch(source, tiles)
+	return merge_tiles(tiles, arrays)
@@ -73,4 +73,10 @@ setup(
         'plotly>=4.1',
     ],
 
+    entry_points={
+        'console_scripts': [
+            'mapped-seed=mapped.caching:main',
+        ],
+    },
+
 )
@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+from PIL import Image
+
+from mapped import add_basemap, tiles
+
+
+def _tile_directory(path, zoom=2):
+	n = 2 ** zoom
+	for x in range(n):
+		for y in range(n):
+			os.makedirs(os.path.join(path, str(zoom), str(x)), exist_ok=True)
+			color = (x * 60, y * 60, 128)
+			Image.new('RGB', (256, 256), color).save(os.path.join(path, str(zoom), str(x), f"{y}.png"))
+	return path
+
+
+def test_provider_name_of_local_source(tmp_path):
+	source = tiles.DirectoryTileSource(_tile_directory(str(tmp_path)))
+	assert tiles.provider_name(source) == source.name
+
+
+def test_basemap_from_tile_directory(tmp_path):
+	path = _tile_directory(str(tmp_path))
+	fig, ax = plt.subplots(figsize=(4, 4))
+	ax.set_xlim(-1e7, 1e7)
+	ax.set_ylim(-1e7, 1e7)
+	add_basemap(ax, zoom=2, tiles=path, crs=3857)
+	assert len(ax.images) == 1
+	assert np.asarray(ax.images[0].get_array()).size > 0
+	plt.close(fig)
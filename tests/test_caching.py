@@ -0,0 +1,42 @@
+import multiprocessing
+
+from mapped.caching import TileCache
+
+
+def _fill(location, offset):
+	cache = TileCache(location, max_bytes=20_000)
+	for i in range(50):
+		cache.put('test', 10, offset + i, 0, bytes([offset % 256, i]) * 500)
+
+
+def test_tile_cache_budget_across_processes(tmp_path):
+	ctx = multiprocessing.get_context('spawn')
+	procs = [ctx.Process(target=_fill, args=(str(tmp_path), 100 * k)) for k in range(4)]
+	for p in procs:
+		p.start()
+	for p in procs:
+		p.join(60)
+	assert [p.exitcode for p in procs] == [0, 0, 0, 0]
+	cache = TileCache(tmp_path, max_bytes=20_000)
+	assert 0 < cache.total_bytes <= 20_000
+	blobs = list((tmp_path / 'blobs').rglob('*'))
+	assert sum(f.stat().st_size for f in blobs if f.is_file()) == cache.total_bytes
+
+
+def test_tile_cache_reads_other_writers(tmp_path):
+	a = TileCache(tmp_path)
+	b = TileCache(tmp_path)
+	a.put('test', 1, 0, 0, b'abc')
+	assert b.total_bytes == 3
+	assert b.get('test', 1, 0, 0) == b'abc'
+
+
+def test_tile_cache_running_total(tmp_path):
+	cache = TileCache(tmp_path, max_bytes=5_000)
+	for i in range(40):
+		cache.put('test', 5, i % 15, 0, bytes([i]) * (100 + 10 * i))
+	cache.put('test', 5, 99, 0, bytes([1]) * 110)  # shares a blob
+	summed = cache._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+	assert cache.total_bytes == summed <= 5_000
+	cache.clear()
+	assert cache.total_bytes == 0 and len(cache) == 0
@@ -0,0 +1,91 @@
+import numpy as np
+import geopandas as gpd
+import pytest
+
+from mapped.density import GeoKernelDensity
+
+
+def _points(n=2000, lat=43.0):
+	rng = np.random.default_rng(0)
+	return gpd.GeoDataFrame(
+		geometry=gpd.points_from_xy(rng.normal(-89.4, 0.02, n), rng.normal(lat, 0.02, n)),
+		crs=4326,
+	)
+
+
+def test_auto_plane_avoids_web_mercator():
+	pts = _points()
+	model = GeoKernelDensity(bandwidth=500, plane_crs='auto').fit(pts.to_crs(3857))
+	assert not model.fit_crs.equals(pts.to_crs(3857).crs)
+	assert model.fit_crs.utm_zone is not None
+
+
+def test_auto_plane_keeps_true_scale_crs():
+	utm = _points().to_crs(32616)
+	model = GeoKernelDensity(bandwidth=500, plane_crs='auto').fit(utm)
+	assert model.fit_crs.equals(utm.crs)
+
+
+def test_auto_plane_matches_haversine_density():
+	pts = _points().to_crs(3857)
+	earth_radius = 6371008.8
+	plane = GeoKernelDensity(bandwidth=500, plane_crs='auto').fit(pts)
+	sphere = GeoKernelDensity(bandwidth=500 / earth_radius).fit(pts)
+	target = pts.iloc[:50]
+	z_plane = plane(target)['Z'].values
+	z_sphere = sphere(target)['Z'].values / earth_radius ** 2
+	np.testing.assert_allclose(z_plane, z_sphere, rtol=0.01)
+
+
+def test_threaded_scoring_keeps_models_apart():
+	from concurrent.futures import ThreadPoolExecutor
+	from mapped.density import _score_blocks
+
+	pts = _points()
+	models = [
+		GeoKernelDensity(bandwidth=b / 6371008.8).fit(pts)
+		for b in (200, 2000)
+	]
+	latlon = np.radians(np.column_stack([pts.geometry.y, pts.geometry.x]))
+	expected = [_score_blocks([m], latlon, n_jobs=1)[0] for m in models]
+	with ThreadPoolExecutor(2) as ex:
+		for _ in range(5):
+			results = [
+				ex.submit(_score_blocks, [m], latlon, 4, 100, 'threads')
+				for m in models
+			]
+			for r, e in zip(results, expected):
+				np.testing.assert_allclose(r.result()[0], e)
+
+
+def test_set_params_plane_crs_matches_constructor():
+	pts = _points().to_crs(3857)
+	direct = GeoKernelDensity(bandwidth=500, plane_crs='auto').fit(pts)
+	later = GeoKernelDensity(bandwidth=500).set_params(plane_crs='auto').fit(pts)
+	assert later.get_params()['metric'] == 'haversine'
+	assert later.effective_metric_ == 'euclidean'
+	target = pts.iloc[:50]
+	np.testing.assert_allclose(later(target)['Z'].values, direct(target)['Z'].values)
+
+
+def _wide_points(n=5000):
+	rng = np.random.default_rng(0)
+	return gpd.GeoDataFrame(
+		geometry=gpd.points_from_xy(rng.uniform(-100, -90, n), rng.uniform(30, 45, n)),
+		crs=4326,
+	)
+
+
+def test_fft_on_wide_web_mercator_mesh():
+	pts = _wide_points()
+	for plane_crs, bandwidth in ((None, 50_000 / 6371008.8), ('auto', 50_000)):
+		model = GeoKernelDensity(bandwidth=bandwidth, plane_crs=plane_crs).fit(pts)
+		mesh = model.meshgrid(bounds=pts.to_crs(3857).total_bounds, resolution=200, crs=3857, engine='fft')
+		assert mesh.attrs['kde_error']['Z']['max_rel_error'] < 0.01
+
+
+def test_fft_warns_on_large_error():
+	pts = _wide_points()
+	model = GeoKernelDensity(bandwidth=2000 / 6371008.8).fit(pts)
+	with pytest.warns(UserWarning, match="'fft' engine"):
+		model.meshgrid(bounds=pts.to_crs(3857).total_bounds, resolution=50, crs=3857, engine='fft')
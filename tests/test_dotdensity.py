@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from shapely.geometry import Point
+
+from mapped.dotdensity import generate_points_in_areas, iter_points_in_areas, PreparedZones
+
+
+def _ring_zones():
+	# a thin ring fills little of its bounding box, so it is sampled on a grid
+	ring = Point(50, 50).buffer(50).difference(Point(50, 50).buffer(45))
+	return gpd.GeoDataFrame({'a': [2000], 'b': [2000]}, geometry=[ring], crs=3857)
+
+
+def _assert_categories_mixed(y, category):
+	y = np.asarray(y)
+	category = np.asarray(category)
+	for c in ('a', 'b'):
+		assert abs(y[category == c].mean() - 50) < 5
+
+
+def test_categories_share_sparse_polygon():
+	zones = _ring_zones()
+	dots = generate_points_in_areas(zones, ['a', 'b'], seed=1)
+	assert (dots['category'].value_counts() == 2000).all()
+	_assert_categories_mixed(dots.geometry.y, dots['category'])
+
+
+def test_prepared_zones_categories_share_sparse_polygon():
+	zones = _ring_zones()
+	dots = PreparedZones(zones).sample(['a', 'b'], seed=1)
+	_assert_categories_mixed(dots.geometry.y, dots['category'])
+
+
+def test_streaming_categories_share_sparse_polygon():
+	zones = _ring_zones()
+	dots = pd.concat(iter_points_in_areas(zones, ['a', 'b'], chunk_size=1000, seed=1))
+	_assert_categories_mixed(dots['y'], dots['category'])
+
+
+def test_plot_dotdensity_on_axes_in_other_crs():
+	import matplotlib
+	matplotlib.use('Agg')
+	from matplotlib import pyplot as plt
+	from shapely.geometry import box
+	from mapped.dotdensity import plot_dotdensity
+
+	zones = gpd.GeoDataFrame({'n': [50000]}, geometry=[box(-89.5, 43.0, -89.3, 43.1)], crs=4326)
+	fig, ax = plt.subplots(figsize=(4, 4))
+	minx, miny, maxx, maxy = zones.to_crs(3857).total_bounds
+	ax.set_xlim(minx, maxx)
+	ax.set_ylim(miny, maxy)
+	ax.crs = zones.to_crs(3857).crs
+	plot_dotdensity(zones, 'n', ax=ax, seed=0)
+	image = ax.get_images()[-1].get_array()
+	assert (np.asarray(image)[..., 3] > 0).mean() > 0.1
+	plt.close(fig)
@@ -0,0 +1,11 @@
+import subprocess
+import sys
+
+
+def test_import_does_not_load_optional_dependencies():
+	code = (
+		"import sys, mapped; "
+		"print(' '.join(m for m in ('sklearn', 'plotly', 'contextily') if m in sys.modules))"
+	)
+	out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+	assert out.stdout.strip() == ''
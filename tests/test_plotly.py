@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+import geopandas as gpd
+import pytest
+from shapely.geometry import box
+
+pytest.importorskip('plotly')
+from mapped.plotly import good_zoom
+
+
+def _reference_zoom(gdf, high_tiles=3):
+	# the original implementation, counting tiles one zoom level at a time
+	ctx = pytest.importorskip('contextily')
+	xmin_, ymin_, xmax_, ymax_ = gdf.to_crs(epsg=3857).total_bounds
+	zoom = 1
+	tiles = {zoom: ctx.howmany(xmin_, ymin_, xmax_, ymax_, zoom, verbose=False)}
+	while tiles[zoom] <= high_tiles:
+		zoom += 1
+		tiles[zoom] = ctx.howmany(xmin_, ymin_, xmax_, ymax_, zoom, verbose=False)
+	return zoom - 1 + ((high_tiles - tiles[zoom - 1]) / (tiles[zoom] - tiles[zoom - 1]))
+
+
+def _extents(n, seed=0):
+	rng = np.random.default_rng(seed)
+	lon = rng.uniform(-170, 160, n)
+	lat = rng.uniform(-70, 60, n)
+	size = 10 ** rng.uniform(-3, 1, n)
+	return [
+		gpd.GeoDataFrame(geometry=[box(x, y, x + s, y + s)], crs=4326)
+		for x, y, s in zip(lon, lat, size)
+	]
+
+
+def test_good_zoom_matches_tile_counting():
+	for gdf in _extents(100):
+		assert good_zoom(gdf) == pytest.approx(_reference_zoom(gdf), abs=1e-9)
+
+
+def test_good_zoom_fits_figure():
+	gdf = gpd.GeoDataFrame(geometry=[box(-90, 42, -89, 43)], crs=4326)
+	zoom = good_zoom(gdf, width=512, height=1024)
+	# one degree of longitude is 1/360 of the 512 pixel zoom 0 world
+	assert zoom == pytest.approx(np.log2(360), abs=1e-6)
+
+
+def test_good_zoom_benchmark():
+	frames = _extents(200, seed=1)
+	start = time.perf_counter()
+	for gdf in frames:
+		_reference_zoom(gdf)
+	reference = time.perf_counter() - start
+	start = time.perf_counter()
+	for gdf in frames:
+		good_zoom(gdf)
+	closed_form = time.perf_counter() - start
+	print(f"good_zoom: {closed_form / len(frames) * 1e6:.0f} us, tile counting: {reference / len(frames) * 1e6:.0f} us")
+	assert closed_form < reference
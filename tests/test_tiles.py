@@ -0,0 +1,140 @@
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+import requests
+from PIL import Image
+
+from mapped import caching, tiles
+from mapped.caching import TileCache, seed_cache
+
+
+def _png(z, x, y):
+	buf = io.BytesIO()
+	Image.new('RGB', (256, 256), (z * 40, x % 256, y % 256)).save(buf, format='PNG')
+	return buf.getvalue()
+
+
+class _TileServer(ThreadingHTTPServer):
+	daemon_threads = True
+
+	def __init__(self):
+		super().__init__(('127.0.0.1', 0), _TileHandler)
+		self.lock = threading.Lock()
+		self.requests = []
+		self.active = 0
+		self.max_active = 0
+		self.missing = set()
+		self.delay = 0.05
+
+	@property
+	def url(self):
+		return f"http://127.0.0.1:{self.server_port}/{{z}}/{{x}}/{{y}}.png"
+
+	@property
+	def host(self):
+		return f"127.0.0.1:{self.server_port}"
+
+
+class _TileHandler(BaseHTTPRequestHandler):
+
+	def do_GET(self):
+		server = self.server
+		z, x, y = (int(v) for v in self.path[1:-len('.png')].split('/'))
+		with server.lock:
+			server.requests.append((z, x, y))
+			server.active += 1
+			server.max_active = max(server.max_active, server.active)
+		try:
+			time.sleep(server.delay)
+			if (z, x, y) in server.missing:
+				self.send_error(404)
+				return
+			body = _png(z, x, y)
+			self.send_response(200)
+			self.send_header('Content-Type', 'image/png')
+			self.send_header('Content-Length', str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+		finally:
+			with server.lock:
+				server.active -= 1
+
+	def log_message(self, *args):
+		pass
+
+
+@pytest.fixture
+def server():
+	server = _TileServer()
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	yield server
+	server.shutdown()
+	server.server_close()
+	tiles.host_limits.pop(server.host, None)
+
+
+@pytest.fixture
+def tile_cache(tmp_path, monkeypatch):
+	cache = TileCache(tmp_path / 'tiles')
+	monkeypatch.setattr(caching, 'tile_cache', cache)
+	monkeypatch.setattr(caching, '_configured', True)
+	return cache
+
+
+def test_fetch_concurrently_within_host_limit(server, tile_cache):
+	tiles.set_host_limit(server.host, 3)
+	fetcher = tiles.TileFetcher(max_workers=8)
+	wanted = tiles.tiles_for_bounds(*[-tiles.WEB_MERCATOR_LIMIT, -tiles.WEB_MERCATOR_LIMIT, tiles.WEB_MERCATOR_LIMIT, tiles.WEB_MERCATOR_LIMIT], 2)
+	arrays = fetcher.fetch(server.url, wanted)
+	assert len(arrays) == 16
+	for (z, x, y), a in zip(wanted, arrays):
+		assert a.shape[:2] == (256, 256)
+		assert tuple(a[0, 0, :3]) == (z * 40, x, y)
+	assert server.max_active == 3
+	# a new limit applies to a host the fetcher is already using
+	tiles.set_host_limit(server.host, 1)
+	server.max_active = 0
+	fetcher.fetch(server.url, tiles.tiles_for_bounds(-1, -1, 1, 1, 3) + tiles.tiles_for_bounds(-1, -1, 1, 1, 4))
+	assert server.max_active == 1
+	fetcher.close()
+
+
+def test_fetch_reuses_cache(server, tile_cache):
+	fetcher = tiles.TileFetcher()
+	wanted = [(1, 0, 0), (1, 1, 0), (1, 0, 1), (1, 1, 1)]
+	first = fetcher.fetch(server.url, wanted, decode=False)
+	assert len(server.requests) == 4
+	assert len(tile_cache) == 4
+	second = fetcher.fetch(server.url, wanted, decode=False)
+	assert second == first
+	assert len(server.requests) == 4
+	fetcher.close()
+
+
+def test_fetch_missing_tile_fails(server, tile_cache):
+	server.missing.add((3, 1, 1))
+	fetcher = tiles.TileFetcher()
+	with pytest.raises(requests.HTTPError):
+		fetcher.fetch(server.url, [(3, 0, 0), (3, 1, 1)])
+	assert (server.url, 3, 1, 1) not in tile_cache
+	assert (server.url, 3, 0, 0) in tile_cache
+	fetcher.close()
+
+
+def test_seed_cache_resumes(server, tile_cache):
+	server.delay = 0
+	world = [-tiles.WEB_MERCATOR_LIMIT, -tiles.WEB_MERCATOR_LIMIT, tiles.WEB_MERCATOR_LIMIT, tiles.WEB_MERCATOR_LIMIT]
+	server.missing.update({(2, 0, 0), (2, 3, 3)})
+	first = seed_cache(world, tiles=server.url, zoom=(0, 2), progress=False)
+	assert first == dict(total=21, cached=0, downloaded=19, failed=2)
+	server.missing.clear()
+	server.requests.clear()
+	second = seed_cache(world, tiles=server.url, zoom=(0, 2), progress=False)
+	assert second == dict(total=21, cached=19, downloaded=2, failed=0)
+	assert sorted(server.requests) == [(2, 0, 0), (2, 3, 3)]
+	assert len(tile_cache) == 21